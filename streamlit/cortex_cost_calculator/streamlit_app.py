@@ -1,3 +1,7 @@
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -15,6 +19,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# Static styles for the Executive Summary readiness gauge; the gauge itself only
+# passes its fill percentage and color as CSS variables.
+READINESS_CSS = """
+<style>
+.readiness-bar {
+    background: linear-gradient(90deg, var(--color) var(--pct), #333 var(--pct));
+    border-radius: 10px; padding: 15px; margin-bottom: 20px;
+}
+.readiness-bar h3 { margin: 0; color: white; }
+.readiness-bar p { margin: 5px 0 0 0; color: white; opacity: 0.9; }
+</style>
+"""
+st.markdown(READINESS_CSS, unsafe_allow_html=True)
+
 # ============================================================================
 # Constants for POC-to-Production scaling and benchmarks
 # ============================================================================
@@ -42,14 +60,100 @@ DATA_MATURITY_THRESHOLDS = {
     "confident": 30,   # High confidence in projections
 }
 
+# Cache lifetime (seconds) for each Snowflake fetch. The ML forecast is retrained at
+# most daily, so it is kept longer than the usage history it is built from.
+CACHE_TTL_SECONDS = {
+    "history": 300,
+    "user_spend": 300,
+    "forecast": 3600,
+    "aisql": 300,
+}
+
+# Largest user/service/feature/model combinations drawn in the attribution sunburst
+SUNBURST_MAX_LEAVES = 200
+
+# Published rates used to sanity-check observed consumption, keyed by a substring of the
+# service name (first match wins). Other services (e.g. Search, which is GB-based) are
+# shown per operation with no baseline.
+OBSERVED_RATE_BASELINES = {
+    "Analyst": {"expected": 0.067, "scale": 1, "decimals": 4, "unit": "credits per message"},
+    # Average of Layout (3.33) and OCR (0.5) per 1,000 pages
+    "Document": {"expected": 1.915, "scale": 1000, "decimals": 2, "unit": "credits per 1,000 pages"},
+}
+
+# 30-day rolling windows computed in Snowflake (selected by fetch_data_from_views).
+# Maps the SQL output columns to the names used by calculate_30day_totals.
+ROLLING_30D_COLUMNS = {
+    "CREDITS_30D_TOTAL": "credits_30d_total",
+    "OPERATIONS_30D_TOTAL": "operations_30d_total",
+    "USERS_30D_AVG": "users_30d_avg",
+}
+
+ROLLING_30D_SQL = """SUM(total_credits) OVER (
+            PARTITION BY service_type ORDER BY date ROWS BETWEEN 29 PRECEDING AND CURRENT ROW
+        ) AS credits_30d_total,
+        SUM(total_operations) OVER (
+            PARTITION BY service_type ORDER BY date ROWS BETWEEN 29 PRECEDING AND CURRENT ROW
+        ) AS operations_30d_total,
+        AVG(daily_unique_users) OVER (
+            PARTITION BY service_type ORDER BY date ROWS BETWEEN 29 PRECEDING AND CURRENT ROW
+        ) AS users_30d_avg"""
+
 # ============================================================================
 # Utility Functions
 # ============================================================================
 
-@st.cache_data(ttl=300, max_entries=10)  # Cache for 5 minutes
+def _prepare_usage_df(df):
+    """Normalize dtypes of a daily usage frame once at load time."""
+    # Low-cardinality groupby key: categorical codes hash faster and use far less memory
+    df['SERVICE_TYPE'] = df['SERVICE_TYPE'].astype('category')
+    # Snowpark hands DATE columns back as Python date objects
+    if df['DATE'].dtype.kind != 'M':
+        df['DATE'] = pd.to_datetime(df['DATE'])
+    return df
+
+def _stamp_fetched_at(df):
+    """Record the query time on a freshly fetched frame (st.cache_data pickles attrs with it)."""
+    df.attrs["fetched_at"] = datetime.now()
+    return df
+
+@st.cache_resource
+def _last_good_results():
+    """
+    Process-wide store of the last successful result per fetch name:
+    {name: (args, fetched_at, df)}. One entry per fetch keeps it bounded.
+    """
+    return {}
+
+def _fetch_with_stale_fallback(name, fetch, *args):
+    """
+    Call a cached fetch and remember its result. If the fetch raises (warehouse outage
+    or maintenance window) and the last good result was for the same arguments, serve
+    that with a warning; otherwise return an empty frame (the fetch has already shown
+    the error). Kept outside st.cache_data so stale data is never cached past the outage.
+    """
+    store = _last_good_results()
+    try:
+        df = fetch(*args)
+    except Exception:
+        last = store.get(name)
+        if last is None or last[0] != args:
+            return pd.DataFrame()
+        _, fetched_at, stale_df = last
+        st.warning(f"Snowflake query failed; showing data last loaded at {fetched_at:%Y-%m-%d %H:%M}.")
+        return stale_df.copy()
+    # Cache hits carry the time of the query that filled the cache, not of this rerun.
+    # Frames the fetch returned after handling an error are unstamped and not kept.
+    fetched_at = df.attrs.get("fetched_at")
+    if fetched_at is not None:
+        store[name] = (args, fetched_at, df)
+    return df
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS["history"], max_entries=10, show_spinner=False)
 def fetch_data_from_views(lookback_days=30):
     """Fetch data from historical snapshot table (with fallback to live view)"""
-    # Try snapshot table first (faster)
+    # Try snapshot table first (faster). Only the columns the tabs read are selected;
+    # per-user and projection figures are derived in pandas where they are shown.
     snapshot_query = f"""
     SELECT
         date,
@@ -57,23 +161,17 @@ def fetch_data_from_views(lookback_days=30):
         daily_unique_users,
         total_operations,
         total_credits,
-        credits_per_user,
-        credits_per_operation,
-        avg_daily_cost_per_user,
-        projected_monthly_cost_per_user,
-        projected_monthly_total_credits,
-        credits_7d_ago,
-        credits_wow_growth_pct
+        {ROLLING_30D_SQL}
     FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_CORTEX_USAGE_HISTORY
-    WHERE date >= DATEADD('day', -{lookback_days}, CURRENT_DATE())
+    WHERE date >= DATEADD('day', -?, CURRENT_DATE())
     ORDER BY date DESC
     """
 
     try:
-        df = session.sql(snapshot_query).to_pandas()
+        df = session.sql(snapshot_query, params=[lookback_days]).to_pandas()
         if not df.empty:
             st.success(f"Loaded {len(df)} rows from snapshot table (optimized for speed)")
-            return df
+            return _stamp_fetched_at(_prepare_usage_df(df))
         else:
             st.info("Snapshot table is empty. Falling back to live views...")
     except Exception as e:
@@ -101,20 +199,14 @@ def fetch_data_from_views(lookback_days=30):
         daily_unique_users,
         total_operations,
         total_credits,
-        credits_per_user,
-        credits_per_operation,
-        ROUND(credits_per_user, 4) AS avg_daily_cost_per_user,
-        ROUND(credits_per_user * 30, 2) AS projected_monthly_cost_per_user,
-        ROUND(total_credits * 30, 2) AS projected_monthly_total_credits,
-        NULL AS credits_7d_ago,
-        NULL AS credits_wow_growth_pct
+        {ROLLING_30D_SQL}
     FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_CORTEX_COST_EXPORT
-    WHERE date >= DATEADD('day', -{lookback_days}, CURRENT_DATE())
+    WHERE date >= DATEADD('day', -?, CURRENT_DATE())
     ORDER BY date DESC
     """
 
     try:
-        df = session.sql(live_query).to_pandas()
+        df = session.sql(live_query, params=[lookback_days]).to_pandas()
         if df.empty:
             st.warning("No data found in the specified lookback period. This may be because:")
             st.info(
@@ -128,7 +220,7 @@ def fetch_data_from_views(lookback_days=30):
             )
         else:
             st.info(f"Loaded {len(df)} rows from live views")
-        return df
+        return _stamp_fetched_at(_prepare_usage_df(df))
     except Exception as e:
         error_msg = str(e).lower()
         if "insufficient privileges" in error_msg or "access denied" in error_msg:
@@ -146,118 +238,220 @@ def fetch_data_from_views(lookback_days=30):
         else:
             st.error(f"Error fetching data: {str(e)}")
             st.info("**Check:** Warehouse is running, views exist, and you have proper permissions")
+            # Not cached: the caller serves the last good result until the warehouse recovers
+            raise
         return pd.DataFrame()
 
-@st.cache_data(ttl=300, max_entries=50)  # Cache for 5 minutes, bounded to 50 entries
+@st.cache_data(ttl=CACHE_TTL_SECONDS["user_spend"], max_entries=50)
 def fetch_user_spend_attribution(lookback_days=30):
     """Fetch user-level spend attribution (Analyst + Functions + Document Processing)."""
-    query = f"""
+    # The attribution tab only reads credits summed per user/service/feature/model, so
+    # the rollup runs in the warehouse: one row per combination instead of one per query
+    query = """
     SELECT
-        usage_date,
         user_name,
         service_type,
         feature_name,
         model_name,
-        credits_used,
-        operations,
-        credits_per_operation
+        SUM(credits_used) AS credits_used
     FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_USER_SPEND_ATTRIBUTION
-    WHERE usage_date >= DATEADD('day', -{lookback_days}, CURRENT_DATE())
-    ORDER BY usage_date DESC, credits_used DESC
+    WHERE usage_date >= DATEADD('day', -?, CURRENT_DATE())
+    GROUP BY 1, 2, 3, 4
     """
     try:
-        df = session.sql(query).to_pandas()
+        df = session.sql(query, params=[lookback_days]).to_pandas()
         if df.empty:
             st.info("No user attribution data found. This view requires query-level tracking.")
-        return df
+        return _stamp_fetched_at(df)
     except Exception as e:
         error_msg = str(e).lower()
         if "does not exist" in error_msg:
             st.warning("User attribution view not found. Deploy the latest monitoring views.")
         else:
             st.error(f"Error fetching user attribution: {str(e)[:100]}")
+            raise
         return pd.DataFrame()
 
-@st.cache_data(ttl=300, max_entries=10)  # Cache for 5 minutes, bounded to 10 entries
+@st.cache_data(ttl=CACHE_TTL_SECONDS["forecast"], max_entries=10)
 def fetch_ml_forecast_12m():
-    """Fetch 12-month daily forecast from the ML-backed view (may be empty if model unavailable)."""
+    """Fetch the 12-month ML forecast rolled up to monthly credits per service (may be empty if model unavailable)."""
+    # Monthly rollup runs in the warehouse: ~12 rows per service instead of 365
     query = """
     SELECT
+        DATE_TRUNC('MONTH', forecast_date) AS month,
         service_type,
-        forecast_date,
-        forecast_credits,
-        lower_bound_credits,
-        upper_bound_credits
+        SUM(forecast_credits) AS forecast_credits,
+        SUM(lower_bound_credits) AS lower_bound_credits,
+        SUM(upper_bound_credits) AS upper_bound_credits
     FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_USAGE_FORECAST_12M
-    ORDER BY forecast_date
+    GROUP BY 1, 2
+    ORDER BY 1, 2
     """
     try:
         df = session.sql(query).to_pandas()
         if df.empty:
             st.info("ML forecast model not available. Using manual projection methods instead.")
             st.caption("**To enable ML forecasting:** Ensure you have privileges to create SNOWFLAKE.ML.FORECAST models")
-        return df
+        else:
+            # Parsed once here so the cached frame is plot-ready on every rerun
+            df["MONTH"] = pd.to_datetime(df["MONTH"])
+        return _stamp_fetched_at(df)
     except Exception as e:
         error_msg = str(e).lower()
         if "does not exist" in error_msg:
             st.info("Forecast view not found. Using manual projections.")
         else:
             st.warning(f"ML forecast unavailable: {str(e)[:100]}")
+            raise
         return pd.DataFrame()
 
 def calculate_30day_totals(df):
-    """Calculate rolling 30-day totals for cost estimation"""
+    """
+    Calculate rolling 30-day totals for cost estimation.
+    Uses the window columns computed in Snowflake when present (query path);
+    falls back to pandas rolling windows for uploaded CSVs.
+    """
     if df.empty:
         return pd.DataFrame()
 
-    # Sort by date ascending for rolling calculations
-    df_sorted = df.sort_values('DATE')
-
-    # Calculate 30-day rolling totals by service type
-    df_sorted['credits_30d_total'] = df_sorted.groupby('SERVICE_TYPE')['TOTAL_CREDITS'].transform(
-        lambda x: x.rolling(window=30, min_periods=1).sum()
-    )
+    if set(ROLLING_30D_COLUMNS).issubset(df.columns):
+        # Windows already computed server-side by fetch_data_from_views
+        df_sorted = df.rename(columns=ROLLING_30D_COLUMNS)
+    else:
+        date_codes, dates = pd.factorize(df['DATE'], sort=True)
+        service_codes, services = pd.factorize(df['SERVICE_TYPE'])
+        cells = date_codes * len(services) + service_codes
+        dense = (
+            len(df) == len(dates) * len(services)
+            and date_codes.min() >= 0 and service_codes.min() >= 0
+            and pd.Index(cells).is_unique
+        )
 
-    df_sorted['operations_30d_total'] = df_sorted.groupby('SERVICE_TYPE')['TOTAL_OPERATIONS'].transform(
-        lambda x: x.rolling(window=30, min_periods=1).sum()
+        if dense:
+            # One row per service per day: lay each metric out as a DATE x SERVICE_TYPE
+            # grid and roll all services in a single 2-D call instead of per group.
+            df_sorted = df.copy()
+            for col, out_col, how in (
+                ('TOTAL_CREDITS', 'credits_30d_total', 'sum'),
+                ('TOTAL_OPERATIONS', 'operations_30d_total', 'sum'),
+                ('DAILY_UNIQUE_USERS', 'users_30d_avg', 'mean'),
+            ):
+                wide = np.empty((len(dates), len(services)))
+                wide[date_codes, service_codes] = df[col].to_numpy(dtype=float)
+                window = pd.DataFrame(wide).rolling(window=30, min_periods=1)
+                df_sorted[out_col] = getattr(window, how)().to_numpy()[date_codes, service_codes]
+        else:
+            # Sparse or duplicated days: sort once by service then date so each group's
+            # rows are contiguous and in rolling order.
+            df_sorted = df.sort_values(['SERVICE_TYPE', 'DATE'])
+
+            # Calculate 30-day rolling totals by service type (single fused pass, no lambdas)
+            rolled = (
+                df_sorted.groupby('SERVICE_TYPE', sort=False, observed=True)[['TOTAL_CREDITS', 'TOTAL_OPERATIONS', 'DAILY_UNIQUE_USERS']]
+                .rolling(window=30, min_periods=1)
+                .agg({'TOTAL_CREDITS': 'sum', 'TOTAL_OPERATIONS': 'sum', 'DAILY_UNIQUE_USERS': 'mean'})
+                .droplevel('SERVICE_TYPE')
+            )
+            # Assigned by index: rows with a NULL SERVICE_TYPE are not in any group and get NaN
+            for col, out_col in (
+                ('TOTAL_CREDITS', 'credits_30d_total'),
+                ('TOTAL_OPERATIONS', 'operations_30d_total'),
+                ('DAILY_UNIQUE_USERS', 'users_30d_avg'),
+            ):
+                df_sorted[out_col] = rolled[col]
+
+    # Calculate 30-day average cost per user (0 where there are no users or no window)
+    credits_30d = df_sorted['credits_30d_total'].to_numpy(dtype=float)
+    users_30d = df_sorted['users_30d_avg'].to_numpy(dtype=float)
+    df_sorted['cost_per_user_30d'] = np.divide(
+        credits_30d, users_30d, out=np.zeros_like(credits_30d), where=users_30d > 0
     )
 
-    df_sorted['users_30d_avg'] = df_sorted.groupby('SERVICE_TYPE')['DAILY_UNIQUE_USERS'].transform(
-        lambda x: x.rolling(window=30, min_periods=1).mean()
-    )
+    return df_sorted.sort_values('DATE', ascending=False)
 
-    # Calculate 30-day average cost per user
-    df_sorted['cost_per_user_30d'] = df_sorted['credits_30d_total'] / df_sorted['users_30d_avg']
-    df_sorted['cost_per_user_30d'] = df_sorted['cost_per_user_30d'].fillna(0)
+def calculate_run_rates(usage, credit_cost):
+    """
+    Monthly and annual run rates from a summarize_usage() result. Kept out of the
+    cache so moving the credit cost only redoes this scalar math.
+    """
+    monthly_credits = usage['avg_daily_credits'] * 30
+    monthly_cost = monthly_credits * credit_cost
+    return {
+        'monthly_credits': monthly_credits,
+        'annual_credits': monthly_credits * 12,
+        'monthly_cost': monthly_cost,
+        'annual_cost': monthly_cost * 12,
+    }
 
-    return df_sorted.sort_values('DATE', ascending=False)
+@st.cache_data(ttl=300, max_entries=10)
+def summarize_usage(df):
+    """
+    Totals and rollups shared by the summary, scaling, forecast, export and history
+    tabs. Cached on the frame's contents so widget-driven reruns reuse them instead
+    of rescanning df.
+    """
+    total_credits = float(df['TOTAL_CREDITS'].sum())
+    daily_credits = df.groupby('DATE', sort=False)['TOTAL_CREDITS'].sum().sort_index()
+    days_of_data = len(daily_credits)
+    service_totals = df.groupby('SERVICE_TYPE', sort=False, observed=True).agg(
+        TOTAL_CREDITS=('TOTAL_CREDITS', 'sum'),
+        DAILY_UNIQUE_USERS=('DAILY_UNIQUE_USERS', 'mean'),
+        TOTAL_OPERATIONS=('TOTAL_OPERATIONS', 'sum'),
+        DAYS_WITH_DATA=('DATE', 'count'),
+    ).sort_index()
+    return {
+        'total_credits': total_credits,
+        'days_of_data': days_of_data,
+        'avg_daily_credits': total_credits / days_of_data if days_of_data > 0 else 0,
+        'avg_daily_users': float(df['DAILY_UNIQUE_USERS'].mean()),
+        'service_credits': service_totals['TOTAL_CREDITS'],
+        'service_totals': service_totals,
+        'daily_credits': daily_credits,
+        'daily_service_credits': (
+            df.groupby(['DATE', 'SERVICE_TYPE'], sort=False, observed=True)['TOTAL_CREDITS'].sum()
+            .reset_index()
+            .sort_values('DATE', ignore_index=True)
+        ),
+    }
 
-def calculate_growth_projection(df, growth_rate, projection_months=12, credit_cost=3.00):
-    """Calculate cost projections based on growth rate"""
-    baseline = df.groupby('SERVICE_TYPE').agg({
-        'TOTAL_CREDITS': 'sum',
-        'DAILY_UNIQUE_USERS': 'mean'
-    }).reset_index()
+@st.cache_data(ttl=300, max_entries=20)
+def calculate_growth_projection(baseline, growth_rate, projection_months=12, credit_cost=3.00):
+    """
+    Calculate cost projections based on growth rate from summarize_usage()['service_totals']
+    (indexed by SERVICE_TYPE).
+    Cached on the baseline and scenario inputs, so reruns that don't move the growth,
+    horizon or credit-price controls reuse the projection.
+    """
+    # Month x service grid via outer products: shape [months, services]
+    months = np.arange(1, projection_months + 1)
+    factors = (1 + growth_rate) ** months
+    n_services = len(baseline)
+
+    projected_credits = np.outer(factors, baseline['TOTAL_CREDITS'].to_numpy(dtype=float))
+    projected_users = np.outer(factors, baseline['DAILY_UNIQUE_USERS'].to_numpy(dtype=float))
+    projected_cost = projected_credits * credit_cost
+    cost_per_user = np.divide(
+        projected_cost, projected_users, out=np.zeros_like(projected_cost), where=projected_users > 0
+    )
 
-    projections = []
-    for month in range(1, projection_months + 1):
-        for _, service in baseline.iterrows():
-            growth_factor = (1 + growth_rate) ** month
-            projected_credits = service['TOTAL_CREDITS'] * growth_factor
-            projected_users = service['DAILY_UNIQUE_USERS'] * growth_factor
-            projected_cost = projected_credits * credit_cost
-
-            projections.append({
-                'month': month,
-                'service_type': service['SERVICE_TYPE'],
-                'projected_credits': projected_credits,
-                'projected_users': projected_users,
-                'projected_cost_usd': projected_cost,
-                'cost_per_user_usd': projected_cost / projected_users if projected_users > 0 else 0,
-                'growth_rate': growth_rate
-            })
-
-    return pd.DataFrame(projections)
+    return pd.DataFrame({
+        'month': np.repeat(months, n_services),
+        'service_type': np.tile(baseline.index.to_numpy(), projection_months),
+        'projected_credits': projected_credits.ravel(),
+        'projected_users': projected_users.ravel(),
+        'projected_cost_usd': projected_cost.ravel(),
+        'cost_per_user_usd': cost_per_user.ravel(),
+        'growth_rate': growth_rate
+    })
+
+@st.cache_data(ttl=300, max_entries=20)
+def calculate_monthly_projection(baseline, growth_rate, projection_months=12, credit_cost=3.00):
+    """
+    Projected cost per month (Series indexed by month) for a growth scenario.
+    Cached alongside calculate_growth_projection so the month rollup runs once per scenario.
+    """
+    projection_df = calculate_growth_projection(baseline, growth_rate, projection_months, credit_cost)
+    return projection_df.groupby('month', sort=False, observed=True)['projected_cost_usd'].sum()
 
 def format_currency(value):
     """Format value as currency"""
@@ -267,12 +461,45 @@ def format_number(value):
     """Format value as number with commas"""
     return f"{value:,.0f}"
 
+def _maybe_downsample(df, x, max_points=2000):
+    """
+    Thin a long-format chart frame to at most ~max_points rows by keeping every
+    n-th distinct x value, so all series keep the same x positions.
+    """
+    if len(df) <= max_points:
+        return df
+    x_values = np.sort(df[x].unique())
+    step = -(-len(df) // max_points)  # ceil division
+    return df[df[x].isin(x_values[::step])]
+
+@st.cache_data(ttl=300, max_entries=5)
+def _csv_gz_bytes(df):
+    """Gzip-compressed CSV of df for download buttons, written in chunks and cached per frame"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, compression='gzip', chunksize=50_000)
+    return buf.getvalue()
+
+@st.cache_data(ttl=300, max_entries=5)
+def _csv_bytes(df):
+    """UTF-8 CSV of df for download buttons, serialized once per frame instead of every rerun"""
+    return df.to_csv(index=False).encode('utf-8')
+
 def assess_data_maturity(df):
     """
     Assess data maturity and return readiness metrics.
     Returns dict with maturity level, days of data, confidence score, and recommendations.
     """
     if df is None or df.empty:
+        return _assess_data_maturity_cached(0, None, None)
+
+    # Cheap fingerprint of the DATE column; the assessment itself is cached on it
+    dates = df['DATE']
+    return _assess_data_maturity_cached(int(dates.nunique()), dates.min(), dates.max())
+
+@st.cache_data(ttl=300)
+def _assess_data_maturity_cached(days_of_data, min_date, max_date):
+    """Maturity assessment from the distinct-day count and date bounds (see assess_data_maturity)."""
+    if days_of_data == 0:
         return {
             "level": "none",
             "days": 0,
@@ -284,11 +511,9 @@ def assess_data_maturity(df):
             "recommendations": ["Deploy monitoring views", "Wait for initial data collection (3+ days)"]
         }
 
-    days_of_data = len(df['DATE'].unique())
-
     # Check for data gaps (missing days)
     if days_of_data > 1:
-        date_range = (df['DATE'].max() - df['DATE'].min()).days + 1
+        date_range = (max_date - min_date).days + 1
         data_completeness = days_of_data / date_range if date_range > 0 else 0
     else:
         data_completeness = 1.0
@@ -413,52 +638,75 @@ def calculate_poc_to_prod_projection(current_monthly_cost, current_users, multip
         "cost_per_user": projected_monthly_cost / projected_users if projected_users > 0 else 0
     }
 
+def calculate_poc_scenario_comparison(current_monthly_cost, current_users):
+    """
+    Project every preset POC_TO_PROD_MULTIPLIERS scenario at once.
+    Same math as calculate_poc_to_prod_projection, evaluated over multiplier arrays.
+    """
+    presets = {name: mult for name, mult in POC_TO_PROD_MULTIPLIERS.items() if name != "Custom"}
+    user_mult = np.array([mult["user_mult"] for mult in presets.values()], dtype=float)
+    usage_mult = np.array([mult["usage_mult"] for mult in presets.values()], dtype=float)
+
+    projected_users = current_users * user_mult
+    projected_monthly_cost = current_monthly_cost * user_mult * usage_mult
+
+    return pd.DataFrame({
+        "Scenario": [name.split(" (")[0] for name in presets],  # Shorten name
+        "Users": projected_users,
+        "Monthly": projected_monthly_cost,
+        "Annual": projected_monthly_cost * 12,
+        "Cost/User": np.divide(
+            projected_monthly_cost, projected_users,
+            out=np.zeros_like(projected_monthly_cost), where=projected_users > 0
+        ),
+    })
+
 def generate_proposal_text(df, credit_cost, maturity, projections, assumptions):
     """
     Generate a formatted text summary for proposals/stakeholder communication.
     """
-    lines = []
-    lines.append("=" * 60)
-    lines.append("CORTEX COST ESTIMATE - EXECUTIVE SUMMARY")
-    lines.append("=" * 60)
-    lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    lines.append(f"Data Confidence: {maturity['confidence_label']} ({maturity['confidence_score']}%)")
-    lines.append("")
-
-    lines.append("CURRENT STATE (Based on observed usage)")
-    lines.append("-" * 40)
-    lines.append(f"  Analysis Period: {maturity['days']} days")
-    lines.append(f"  Monthly Run Rate: {format_currency(projections['current_monthly'])}")
-    lines.append(f"  Avg Daily Users: {projections['avg_users']:.0f}")
-    lines.append("")
-
-    lines.append("PROJECTED COSTS")
-    lines.append("-" * 40)
-    lines.append(f"  Monthly Estimate: {format_currency(projections['projected_monthly'])}")
-    lines.append(f"  Annual Estimate: {format_currency(projections['projected_annual'])}")
-    lines.append(f"  Confidence Range: {format_currency(projections['lower_bound'])} - {format_currency(projections['upper_bound'])}")
-    lines.append("")
-
-    lines.append("ASSUMPTIONS")
-    lines.append("-" * 40)
-    for assumption in assumptions:
-        lines.append(f"  - {assumption}")
-    lines.append("")
-
-    lines.append("COST BREAKDOWN BY SERVICE")
-    lines.append("-" * 40)
-    if 'service_breakdown' in projections:
-        for service, cost in projections['service_breakdown'].items():
-            pct = (cost / projections['projected_monthly'] * 100) if projections['projected_monthly'] > 0 else 0
-            lines.append(f"  {service}: {format_currency(cost)} ({pct:.1f}%)")
-    lines.append("")
+    rule = "=" * 60
+    divider = "-" * 40
 
-    lines.append("=" * 60)
-    lines.append("Note: Estimates based on POC/trial usage patterns.")
-    lines.append("Actual production costs may vary based on adoption and usage intensity.")
-    lines.append("=" * 60)
+    assumption_lines = "".join(f"  - {assumption}\n" for assumption in assumptions)
 
-    return "\n".join(lines)
+    breakdown_lines = ""
+    if 'service_breakdown' in projections:
+        total = projections['projected_monthly']
+        pct_scale = 100 / total if total > 0 else 0
+        breakdown_lines = "".join(
+            f"  {service}: ${cost:,.2f} ({cost * pct_scale:.1f}%)\n"
+            for service, cost in projections['service_breakdown'].items()
+        )
+
+    return f"""{rule}
+CORTEX COST ESTIMATE - EXECUTIVE SUMMARY
+{rule}
+Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+Data Confidence: {maturity['confidence_label']} ({maturity['confidence_score']}%)
+
+CURRENT STATE (Based on observed usage)
+{divider}
+  Analysis Period: {maturity['days']} days
+  Monthly Run Rate: ${projections['current_monthly']:,.2f}
+  Avg Daily Users: {projections['avg_users']:.0f}
+
+PROJECTED COSTS
+{divider}
+  Monthly Estimate: ${projections['projected_monthly']:,.2f}
+  Annual Estimate: ${projections['projected_annual']:,.2f}
+  Confidence Range: ${projections['lower_bound']:,.2f} - ${projections['upper_bound']:,.2f}
+
+ASSUMPTIONS
+{divider}
+{assumption_lines}
+COST BREAKDOWN BY SERVICE
+{divider}
+{breakdown_lines}
+{rule}
+Note: Estimates based on POC/trial usage patterns.
+Actual production costs may vary based on adoption and usage intensity.
+{rule}"""
 
 # ============================================================================
 # Main Application
@@ -467,7 +715,17 @@ def generate_proposal_text(df, credit_cost, maturity, projections, assumptions):
 def load_data_from_csv(uploaded_file):
     """Load and validate data from uploaded CSV file"""
     try:
-        df = pd.read_csv(uploaded_file)
+        # Arrow's multithreaded C++ parser; DATE is parsed during the read
+        try:
+            df = pd.read_csv(uploaded_file, engine='pyarrow', parse_dates=['DATE'])
+        except KeyError:
+            # No DATE column to parse; re-read and let the column check below report it
+            uploaded_file.seek(0)
+            df = pd.read_csv(uploaded_file, engine='pyarrow')
+
+        # Standardize column names (handle case variations) before any column lookups
+        if not df.columns.equals(df.columns.str.upper()):
+            df.columns = df.columns.str.upper()
 
         # Expected columns from sql/02_utilities/export_metrics.sql (Option 1/2)
         required_cols = ['DATE', 'SERVICE_TYPE', 'DAILY_UNIQUE_USERS', 'TOTAL_OPERATIONS', 'TOTAL_CREDITS']
@@ -479,9 +737,6 @@ def load_data_from_csv(uploaded_file):
             st.info("**Source query:** Use `sql/02_utilities/export_metrics.sql` to generate the correct CSV format")
             return None
 
-        # Standardize column names (handle case variations)
-        df.columns = df.columns.str.upper()
-
         # Validate row count
         if len(df) == 0:
             st.error("CSV file is empty. No data rows found.")
@@ -490,13 +745,14 @@ def load_data_from_csv(uploaded_file):
         if len(df) > 100000:
             st.warning(f"Large file detected ({len(df):,} rows). Processing may be slow. Consider filtering the date range.")
 
-        # Convert and validate date column
-        try:
-            df['DATE'] = pd.to_datetime(df['DATE'])
-        except Exception as date_err:
-            st.error(f"Invalid date format in DATE column: {str(date_err)}")
-            st.info("**Expected format:** YYYY-MM-DD (e.g., 2025-01-05)")
-            return None
+        # Validate date column (Arrow leaves values it cannot parse as strings)
+        if df['DATE'].dtype.kind != 'M':
+            try:
+                df['DATE'] = pd.to_datetime(df['DATE'])
+            except Exception as date_err:
+                st.error(f"Invalid date format in DATE column: {str(date_err)}")
+                st.info("**Expected format:** YYYY-MM-DD (e.g., 2025-01-05)")
+                return None
 
         # Validate date range
         min_date = df['DATE'].min()
@@ -511,24 +767,32 @@ def load_data_from_csv(uploaded_file):
             st.warning(f"Date range spans {date_range_days} days (> 2 years). This may impact performance.")
 
         # Validate TOTAL_CREDITS column
-        if not pd.api.types.is_numeric_dtype(df['TOTAL_CREDITS']):
+        if df['TOTAL_CREDITS'].dtype.kind not in 'fiu':
             st.error("TOTAL_CREDITS column must contain numeric values")
             return None
 
-        # Check for negative credits
-        negative_credits = df[df['TOTAL_CREDITS'] < 0]
-        if len(negative_credits) > 0:
-            st.error(f"Found {len(negative_credits)} rows with negative credits. Credits must be >= 0")
-            st.dataframe(negative_credits.head())
+        # Negative and null credit checks share one float view of the column
+        credits = df['TOTAL_CREDITS'].to_numpy(dtype=float, na_value=np.nan)
+        negative_mask = credits < 0
+        negative_count = int(negative_mask.sum())
+        if negative_count > 0:
+            st.error(f"Found {negative_count} rows with negative credits. Credits must be >= 0")
+            st.dataframe(df.loc[negative_mask].head())
             return None
 
-        # Check for null credits
-        null_credits = df[df['TOTAL_CREDITS'].isna()]
-        if len(null_credits) > 0:
-            st.warning(f"Found {len(null_credits)} rows with NULL credits. These will be excluded from calculations.")
-            df = df[df['TOTAL_CREDITS'].notna()]
+        null_mask = np.isnan(credits)
+        null_count = int(null_mask.sum())
+        if null_count > 0:
+            st.warning(f"Found {null_count} rows with NULL credits. These will be excluded from calculations.")
+            df = df.loc[~null_mask].copy()
+
+        # Validate SERVICE_TYPE values (blank services cannot be grouped or attributed)
+        null_service_mask = df['SERVICE_TYPE'].isna().to_numpy()
+        null_service_count = int(null_service_mask.sum())
+        if null_service_count > 0:
+            st.warning(f"Found {null_service_count} rows with a blank SERVICE_TYPE. These will be excluded from calculations.")
+            df = df.loc[~null_service_mask].copy()
 
-        # Validate SERVICE_TYPE values
         known_services = [
             'Cortex Analyst',
             'Cortex Search',
@@ -536,7 +800,8 @@ def load_data_from_csv(uploaded_file):
             'Cortex Document Processing',
             'Cortex Fine-tuning',
         ]
-        unknown_services = set(df['SERVICE_TYPE'].unique()) - set(known_services)
+        df = _prepare_usage_df(df)
+        unknown_services = set(df['SERVICE_TYPE'].cat.categories) - set(known_services)
         if unknown_services:
             st.info(f"Found unknown service types: {', '.join(unknown_services)}. These will be included in analysis.")
 
@@ -562,11 +827,13 @@ def load_data_from_csv(uploaded_file):
 
 def create_credit_summary(df, credit_cost=3.00):
     """Create credit estimate summary for sales team"""
-    summary = df.groupby('SERVICE_TYPE').agg({
-        'TOTAL_CREDITS': 'sum',
-        'DAILY_UNIQUE_USERS': 'mean',
-        'DATE': ['min', 'max']
-    }).reset_index()
+    # Named aggregation gives flat columns without a MultiIndex to flatten
+    summary = df.groupby('SERVICE_TYPE', sort=False, observed=True).agg(
+        TOTAL_CREDITS=('TOTAL_CREDITS', 'sum'),
+        DAILY_UNIQUE_USERS=('DAILY_UNIQUE_USERS', 'mean'),
+        START_DATE=('DATE', 'min'),
+        END_DATE=('DATE', 'max'),
+    ).reset_index().sort_values('SERVICE_TYPE', ignore_index=True)
 
     summary.columns = ['Service', 'Total Credits', 'Avg Daily Users', 'Start Date', 'End Date']
     summary['Days of Data'] = (summary['End Date'] - summary['Start Date']).dt.days + 1
@@ -638,13 +905,15 @@ def main():
 
         st.divider()
 
-        credit_cost = st.number_input(
+        # Rounded to the cent so typed prices that only differ past the second decimal
+        # share one entry in the cached projection and figure builders
+        credit_cost = round(st.number_input(
             "Cost per Credit (USD)",
             value=3.00,
             min_value=0.01,
             step=0.10,
             help="Adjust based on your Snowflake pricing"
-        )
+        ), 2)
 
         variance_pct = st.slider(
             "Projection Variance (%)",
@@ -659,13 +928,8 @@ def main():
     # Load data based on source
     df = None
     if data_source == "Query Views (Same Account)":
-        try:
-            with st.spinner("Loading data from views..."):
-                df = fetch_data_from_views(lookback_days)
-        except Exception as e:
-            st.error(f"Error querying views: {str(e)}")
-            st.info("Make sure monitoring views are deployed in SNOWFLAKE_EXAMPLE.CORTEX_USAGE")
-            return
+        with st.spinner("Loading data from views..."):
+            df = _fetch_with_stale_fallback("history", fetch_data_from_views, lookback_days)
     else:
         if 'uploaded_file' in locals() and uploaded_file is not None:
             with st.spinner("Loading CSV file..."):
@@ -682,10 +946,12 @@ def main():
 
     if df is None or df.empty:
         st.warning("No data available. Please check your data source.")
+        if data_source == "Query Views (Same Account)":
+            st.info("Make sure monitoring views are deployed in SNOWFLAKE_EXAMPLE.CORTEX_USAGE")
         return
 
-    # Normalize column names
-    df.columns = df.columns.str.upper()
+    # Column names are already upper case: Snowflake returns unquoted identifiers
+    # that way and load_data_from_csv normalizes uploads
     if 'DATE' not in df.columns:
         df['DATE'] = pd.to_datetime(df['USAGE_DATE']) if 'USAGE_DATE' in df.columns else pd.to_datetime(df.iloc[:, 0])
 
@@ -701,35 +967,39 @@ def main():
         "Export & Proposal"
     ])
 
+    # Assessed once per rerun and shared by the decision-support tabs
+    maturity = assess_data_maturity(df)
+    usage = summarize_usage(df)
+
     with tab_summary:
-        show_executive_summary(df, credit_cost, variance_pct, data_source)
+        show_executive_summary(df, credit_cost, variance_pct, data_source, maturity, usage)
 
     with tab_scaling:
-        show_poc_to_production(df, credit_cost)
+        show_poc_to_production(df, credit_cost, maturity, usage)
 
     with tab_forecast:
-        show_12_month_forecast(data_source=data_source, credit_cost=credit_cost, df=df)
+        show_12_month_forecast(data_source=data_source, credit_cost=credit_cost, df=df, usage=usage)
 
     with tab_user:
         show_user_spend_attribution(data_source=data_source, lookback_days=lookback_days if data_source == "Query Views (Same Account)" else None, credit_cost=credit_cost)
 
     with tab_hist:
-        show_historical_analysis(df, credit_cost)
+        show_historical_analysis(df, credit_cost, usage)
 
     with tab_aisql:
         show_aisql_functions(credit_cost)
 
     with tab_proj:
-        show_cost_projections(df, credit_cost, variance_pct)
+        show_cost_projections(df, credit_cost, variance_pct, usage)
 
     with tab_export:
-        show_export_proposal(df, credit_cost, variance_pct)
+        show_export_proposal(df, credit_cost, variance_pct, maturity, usage)
 
 # ============================================================================
 # Executive Summary - Decision Support Dashboard
 # ============================================================================
 
-def show_executive_summary(df, credit_cost, variance_pct, data_source):
+def show_executive_summary(df, credit_cost, variance_pct, data_source, maturity, usage):
     """
     Primary landing page: Quick confidence snapshot for decision-makers.
     Answers: What will this cost at scale? Can I trust these numbers?
@@ -737,24 +1007,19 @@ def show_executive_summary(df, credit_cost, variance_pct, data_source):
     st.header("Executive Summary")
     st.caption("Get confident in your Cortex cost projections - no clicking required")
 
-    # Assess data maturity
-    maturity = assess_data_maturity(df)
-
     # ========================================================================
     # Data Readiness Indicator (Am I Ready?)
     # ========================================================================
     col_ready, col_spacer = st.columns([3, 1])
 
     with col_ready:
-        # Create a visual confidence gauge
-        confidence_color = maturity['color']
-        st.markdown(f"""
-        <div style="background: linear-gradient(90deg, {confidence_color} {maturity['confidence_score']}%, #333 {maturity['confidence_score']}%);
-                    border-radius: 10px; padding: 15px; margin-bottom: 20px;">
-            <h3 style="margin: 0; color: white;">Data Readiness: {maturity['confidence_label']}</h3>
-            <p style="margin: 5px 0 0 0; color: white; opacity: 0.9;">{maturity['message']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        # Create a visual confidence gauge (styles come from READINESS_CSS)
+        st.markdown(
+            f'<div class="readiness-bar" style="--pct: {maturity["confidence_score"]}%; --color: {maturity["color"]};">'
+            f'<h3>Data Readiness: {maturity["confidence_label"]}</h3>'
+            f'<p>{maturity["message"]}</p></div>',
+            unsafe_allow_html=True
+        )
 
     # ========================================================================
     # Key Decision Metrics - Single Screen Snapshot
@@ -762,25 +1027,22 @@ def show_executive_summary(df, credit_cost, variance_pct, data_source):
     st.subheader("Confidence Snapshot")
 
     # Calculate key metrics
-    total_credits = df['TOTAL_CREDITS'].sum()
     days_of_data = maturity['days']
 
-    # Daily and monthly run rates
-    avg_daily_credits = total_credits / days_of_data if days_of_data > 0 else 0
-    monthly_run_rate = avg_daily_credits * 30
-    annual_run_rate = monthly_run_rate * 12
+    # Monthly and annual run rates
+    run_rates = calculate_run_rates(usage, credit_cost)
+    monthly_cost = run_rates['monthly_cost']
+    annual_cost = run_rates['annual_cost']
 
     # User metrics
-    avg_daily_users = df['DAILY_UNIQUE_USERS'].mean() if 'DAILY_UNIQUE_USERS' in df.columns else 0
-    cost_per_user_month = (monthly_run_rate * credit_cost) / avg_daily_users if avg_daily_users > 0 else 0
+    avg_daily_users = usage['avg_daily_users']
+    cost_per_user_month = monthly_cost / avg_daily_users if avg_daily_users > 0 else 0
 
     # Calculate confidence intervals
-    monthly_cost = monthly_run_rate * credit_cost
-    annual_cost = annual_run_rate * credit_cost
     lower_annual, upper_annual, actual_variance = calculate_confidence_interval(annual_cost, maturity['confidence_score'])
 
     # Top cost drivers
-    service_costs = df.groupby('SERVICE_TYPE')['TOTAL_CREDITS'].sum().sort_values(ascending=False)
+    service_costs = usage['service_credits'].sort_values(ascending=False)
     top_3_services = service_costs.head(3)
 
     # Display key metrics
@@ -832,21 +1094,18 @@ def show_executive_summary(df, credit_cost, variance_pct, data_source):
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        cost_driver_data = []
-        total_cost = service_costs.sum() * credit_cost
-        for service, credits in top_3_services.items():
-            cost = credits * credit_cost
-            pct = (credits / service_costs.sum() * 100) if service_costs.sum() > 0 else 0
-            cost_driver_data.append({
-                "Service": service,
-                "Monthly Cost": format_currency(cost / days_of_data * 30) if days_of_data > 0 else "$0",
-                "% of Total": f"{pct:.1f}%",
-                "Trend": "→"  # Could be enhanced with actual trend data
-            })
-
-        if cost_driver_data:
+        top_credits = top_3_services.to_numpy(dtype=float)
+        total_service_credits = service_costs.sum()
+        cost_drivers = pd.DataFrame({
+            "Service": top_3_services.index.astype(str),
+            "Monthly Cost": top_credits * credit_cost / days_of_data * 30 if days_of_data > 0 else 0.0,
+            "% of Total": top_credits / total_service_credits * 100 if total_service_credits > 0 else 0.0,
+            "Trend": "→"  # Could be enhanced with actual trend data
+        })
+
+        if not cost_drivers.empty:
             st.dataframe(
-                pd.DataFrame(cost_driver_data),
+                cost_drivers.style.format({"Monthly Cost": "${:,.2f}", "% of Total": "{:.1f}%"}),
                 use_container_width=True,
                 hide_index=True
             )
@@ -907,7 +1166,7 @@ def show_executive_summary(df, credit_cost, variance_pct, data_source):
         """)
 
 
-def show_poc_to_production(df, credit_cost):
+def show_poc_to_production(df, credit_cost, maturity, usage):
     """
     POC to Production scaling calculator with built-in multipliers.
     Helps users answer: "If we scale from POC to production, what should we budget?"
@@ -915,9 +1174,6 @@ def show_poc_to_production(df, credit_cost):
     st.header("POC → Production Scaling")
     st.caption("Estimate production costs based on your POC/trial data")
 
-    # Assess data maturity
-    maturity = assess_data_maturity(df)
-
     if not maturity['ready_for_projection']:
         st.warning(maturity['message'])
         st.info("You need at least 3 days of data to use this calculator. Use the 'Cost Projections' tab with published Snowflake rates instead.")
@@ -925,10 +1181,8 @@ def show_poc_to_production(df, credit_cost):
 
     # Calculate current state from data
     days_of_data = maturity['days']
-    total_credits = df['TOTAL_CREDITS'].sum()
-    avg_daily_credits = total_credits / days_of_data if days_of_data > 0 else 0
-    current_monthly_cost = avg_daily_credits * 30 * credit_cost
-    current_users = df['DAILY_UNIQUE_USERS'].mean() if 'DAILY_UNIQUE_USERS' in df.columns else 1
+    current_monthly_cost = calculate_run_rates(usage, credit_cost)['monthly_cost']
+    current_users = usage['avg_daily_users']
 
     st.subheader("Your Current POC State")
 
@@ -1044,21 +1298,15 @@ def show_poc_to_production(df, credit_cost):
     # ========================================================================
     st.subheader("Compare All Scenarios")
 
-    comparison_data = []
-    for name, mult in POC_TO_PROD_MULTIPLIERS.items():
-        if name == "Custom":
-            continue
-        proj = calculate_poc_to_prod_projection(current_monthly_cost, current_users, name)
-        comparison_data.append({
-            "Scenario": name.split(" (")[0],  # Shorten name
-            "Users": f"{proj['projected_users']:.1f}",
-            "Monthly": format_currency(proj['projected_monthly_cost']),
-            "Annual": format_currency(proj['projected_annual_cost']),
-            "Cost/User": format_currency(proj['cost_per_user'])
-        })
+    comparison = calculate_poc_scenario_comparison(current_monthly_cost, current_users)
 
     st.dataframe(
-        pd.DataFrame(comparison_data),
+        comparison.style.format({
+            "Users": "{:.1f}",
+            "Monthly": "${:,.2f}",
+            "Annual": "${:,.2f}",
+            "Cost/User": "${:,.2f}"
+        }),
         use_container_width=True,
         hide_index=True
     )
@@ -1119,7 +1367,7 @@ def show_poc_to_production(df, credit_cost):
         """)
 
 
-def show_export_proposal(df, credit_cost, variance_pct):
+def show_export_proposal(df, credit_cost, variance_pct, maturity, usage):
     """
     Generate shareable proposal/summary for stakeholders.
     One-click export to text, CSV, or formatted summary.
@@ -1127,23 +1375,19 @@ def show_export_proposal(df, credit_cost, variance_pct):
     st.header("Export & Proposal Generator")
     st.caption("Generate stakeholder-ready summaries and export data")
 
-    # Assess data maturity
-    maturity = assess_data_maturity(df)
-
     # Calculate projections for export
     days_of_data = maturity['days']
-    total_credits = df['TOTAL_CREDITS'].sum()
-    avg_daily_credits = total_credits / days_of_data if days_of_data > 0 else 0
-    monthly_cost = avg_daily_credits * 30 * credit_cost
-    annual_cost = monthly_cost * 12
-    avg_users = df['DAILY_UNIQUE_USERS'].mean() if 'DAILY_UNIQUE_USERS' in df.columns else 0
+    run_rates = calculate_run_rates(usage, credit_cost)
+    monthly_cost = run_rates['monthly_cost']
+    annual_cost = run_rates['annual_cost']
+    avg_users = usage['avg_daily_users']
 
     lower, upper, variance = calculate_confidence_interval(annual_cost, maturity['confidence_score'])
 
-    # Service breakdown
-    service_breakdown = {}
-    for service, credits in df.groupby('SERVICE_TYPE')['TOTAL_CREDITS'].sum().items():
-        service_breakdown[service] = (credits / days_of_data * 30 * credit_cost) if days_of_data > 0 else 0
+    # Service breakdown (monthly cost per service)
+    monthly_scale = 30 * credit_cost / days_of_data if days_of_data > 0 else 0
+    service_monthly = usage['service_credits'] * monthly_scale
+    service_breakdown = service_monthly.to_dict()
 
     projections = {
         'current_monthly': monthly_cost,
@@ -1239,10 +1483,10 @@ def show_export_proposal(df, credit_cost, variance_pct):
     with col3:
         # Full raw data export
         st.download_button(
-            label="Download Raw Data (CSV)",
-            data=df.to_csv(index=False),
-            file_name=f"cortex_usage_data_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv",
+            label="Download Raw Data (CSV, gzip)",
+            data=_csv_gz_bytes(df),
+            file_name=f"cortex_usage_data_{datetime.now().strftime('%Y%m%d')}.csv.gz",
+            mime="application/gzip",
             use_container_width=True
         )
 
@@ -1253,19 +1497,20 @@ def show_export_proposal(df, credit_cost, variance_pct):
     # ========================================================================
     st.subheader("Detailed Service Breakdown")
 
-    service_table = []
-    for service, monthly_cost_svc in service_breakdown.items():
-        annual_cost_svc = monthly_cost_svc * 12
-        pct = (monthly_cost_svc / monthly_cost * 100) if monthly_cost > 0 else 0
-        service_table.append({
-            'Service': service,
-            'Monthly Cost': format_currency(monthly_cost_svc),
-            'Annual Cost': format_currency(annual_cost_svc),
-            '% of Total': f"{pct:.1f}%"
-        })
+    service_monthly_cost = service_monthly.to_numpy(dtype=float)
+    service_table = pd.DataFrame({
+        'Service': service_monthly.index.astype(str),
+        'Monthly Cost': service_monthly_cost,
+        'Annual Cost': service_monthly_cost * 12,
+        '% of Total': service_monthly_cost / monthly_cost * 100 if monthly_cost > 0 else 0.0
+    })
 
     st.dataframe(
-        pd.DataFrame(service_table),
+        service_table.style.format({
+            'Monthly Cost': '${:,.2f}',
+            'Annual Cost': '${:,.2f}',
+            '% of Total': '{:.1f}%'
+        }),
         use_container_width=True,
         hide_index=True
     )
@@ -1284,6 +1529,29 @@ def show_export_proposal(df, credit_cost, variance_pct):
     st.code(quick_summary, language=None)
     st.caption("Copy the above text for quick sharing via email or Slack")
 
+@st.cache_data(ttl=600, max_entries=10)
+def build_top_users_chart(top_users):
+    """Top-users bar chart, cached on its data so drill-down reruns reuse the figure"""
+    fig = px.bar(
+        top_users,
+        x="USER_NAME",
+        y="CREDITS_USED",
+        title="Top users by credits consumed (attributed)",
+        labels={"USER_NAME": "User", "CREDITS_USED": "Credits"},
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+    return fig
+
+@st.cache_data(ttl=600, max_entries=10)
+def build_spend_sunburst(sunburst_df):
+    """User -> service -> feature -> model sunburst, cached on its data"""
+    return px.sunburst(
+        sunburst_df,
+        path=["USER_NAME", "SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"],
+        values="CREDITS_USED",
+        title="User -> service -> feature -> model (credits)",
+    )
+
 def show_user_spend_attribution(data_source, lookback_days, credit_cost):
     """Primary view: who is driving spend, and with which features/models."""
     st.header("User Spend Attribution")
@@ -1295,25 +1563,35 @@ def show_user_spend_attribution(data_source, lookback_days, credit_cost):
     if lookback_days is None:
         lookback_days = 30
 
-    try:
-        with st.spinner("Loading user attribution data..."):
-            udf = fetch_user_spend_attribution(lookback_days)
-    except Exception as e:
-        st.error(f"Error loading user attribution views: {str(e)}")
-        st.info("Make sure monitoring views v3.1+ are deployed (V_USER_SPEND_ATTRIBUTION).")
-        return
+    # Every tab body runs on each rerun, so hold the query until the user asks for it
+    if not st.session_state.get("user_attribution_requested", False):
+        if not st.button("Load user attribution", help="Query V_USER_SPEND_ATTRIBUTION for the selected lookback"):
+            st.caption("User-level attribution is queried on demand to keep other tabs responsive.")
+            return
+        st.session_state.user_attribution_requested = True
+
+    with st.spinner("Loading user attribution data..."):
+        udf = _fetch_with_stale_fallback("user_spend", fetch_user_spend_attribution, lookback_days)
 
     if udf is None or udf.empty:
         st.warning("No attributable user-level data found in the selected period.")
         st.caption("Note: some services (e.g., Cortex Search) cannot be attributed to users due to platform limitations.")
+        st.info("Make sure monitoring views v3.1+ are deployed (V_USER_SPEND_ATTRIBUTION).")
         return
 
     udf.columns = udf.columns.str.upper()
     udf["COST_USD"] = udf["CREDITS_USED"] * credit_cost
 
+    # Non-LLM features have no model; label them up front so every view and the
+    # plotly sunburst (which rejects NULL labels) see the same "(none)" bucket.
+    udf["MODEL_NAME"] = udf["MODEL_NAME"].fillna("(none)")
+    # Few distinct values per column: categorical codes hash and compare as ints
+    for col in ("USER_NAME", "SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"):
+        udf[col] = udf[col].astype("category")
+
     total_credits = float(udf["CREDITS_USED"].sum())
     total_cost = float(udf["COST_USD"].sum())
-    unique_users = int(udf["USER_NAME"].nunique())
+    unique_users = len(udf["USER_NAME"].cat.categories)
 
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -1325,23 +1603,24 @@ def show_user_spend_attribution(data_source, lookback_days, credit_cost):
 
     st.divider()
 
+    # One pass over udf at the finest grain; the top-user, sunburst and drill-down
+    # views below are rollups/filters of this small frame. dropna=False keeps rows
+    # with a NULL service or feature so they still count toward a user's total.
+    detail_keys = ["USER_NAME", "SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"]
+    user_detail = udf.groupby(detail_keys, as_index=False, sort=False, observed=True, dropna=False)[
+        ["CREDITS_USED", "COST_USD"]
+    ].sum()
+    user_detail = user_detail[user_detail["USER_NAME"].notna()]
+    labelled_detail = user_detail.dropna(subset=["SERVICE_TYPE", "FEATURE_NAME"])
+
     st.subheader("Top Users by Spend")
     top_users = (
-        udf.groupby("USER_NAME", as_index=False)[["CREDITS_USED", "COST_USD"]]
+        user_detail.groupby("USER_NAME", as_index=False, sort=False, observed=True)[["CREDITS_USED", "COST_USD"]]
         .sum()
-        .sort_values("CREDITS_USED", ascending=False)
-        .head(15)
+        .nlargest(15, "CREDITS_USED")
     )
 
-    fig_users = px.bar(
-        top_users,
-        x="USER_NAME",
-        y="CREDITS_USED",
-        title="Top users by credits consumed (attributed)",
-        labels={"USER_NAME": "User", "CREDITS_USED": "Credits"},
-    )
-    fig_users.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig_users, use_container_width=True)
+    st.plotly_chart(build_top_users_chart(top_users), use_container_width=True)
 
     st.dataframe(
         top_users.style.format({"CREDITS_USED": "{:,.4f}", "COST_USD": "${:,.2f}"}),
@@ -1352,35 +1631,36 @@ def show_user_spend_attribution(data_source, lookback_days, credit_cost):
     st.divider()
 
     st.subheader("What Features Are Driving Spend?")
-    sunburst_df = (
-        udf.groupby(["USER_NAME", "SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"], as_index=False)["CREDITS_USED"]
-        .sum()
-        .sort_values("CREDITS_USED", ascending=False)
-    )
+    # Plotly orders the slices itself, so only the truncated case needs the largest leaves
+    sunburst_df = labelled_detail[detail_keys + ["CREDITS_USED"]]
+
+    # Every leaf is serialized to the browser; keep the largest and bucket the long tail
+    if len(sunburst_df) > SUNBURST_MAX_LEAVES:
+        top_leaves = sunburst_df.nlargest(SUNBURST_MAX_LEAVES, "CREDITS_USED")
+        other_credits = sunburst_df["CREDITS_USED"].sum() - top_leaves["CREDITS_USED"].sum()
+        sunburst_df = pd.concat([
+            top_leaves.astype({key: str for key in detail_keys}),
+            pd.DataFrame({
+                "USER_NAME": ["(other users)"],
+                "SERVICE_TYPE": ["(other)"],
+                "FEATURE_NAME": ["(other)"],
+                "MODEL_NAME": ["(other)"],
+                "CREDITS_USED": [other_credits],
+            }),
+        ], ignore_index=True)
+        st.caption(f"Showing the top {SUNBURST_MAX_LEAVES} combinations; the rest are grouped under '(other users)'.")
 
-    # Plotly sunburst struggles with NULL labels; normalize for visualization.
-    sunburst_df["MODEL_NAME"] = sunburst_df["MODEL_NAME"].fillna("(none)")
-
-    fig_sb = px.sunburst(
-        sunburst_df,
-        path=["USER_NAME", "SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"],
-        values="CREDITS_USED",
-        title="User -> service -> feature -> model (credits)",
-    )
-    st.plotly_chart(fig_sb, use_container_width=True)
+    st.plotly_chart(build_spend_sunburst(sunburst_df), use_container_width=True)
 
     st.divider()
 
     st.subheader("Drill-down: User Details")
-    user_options = [u for u in udf["USER_NAME"].unique() if u is not None]
+    user_options = user_detail["USER_NAME"].unique().tolist()
     selected_user = st.selectbox("Select a user", options=sorted(user_options))
-    user_df = udf[udf["USER_NAME"] == selected_user].copy()
     user_breakdown = (
-        user_df.groupby(["SERVICE_TYPE", "FEATURE_NAME", "MODEL_NAME"], as_index=False)[["CREDITS_USED", "COST_USD"]]
-        .sum()
+        labelled_detail.loc[labelled_detail["USER_NAME"] == selected_user, detail_keys[1:] + ["CREDITS_USED", "COST_USD"]]
         .sort_values("CREDITS_USED", ascending=False)
     )
-    user_breakdown["MODEL_NAME"] = user_breakdown["MODEL_NAME"].fillna("(none)")
 
     st.dataframe(
         user_breakdown.style.format({"CREDITS_USED": "{:,.4f}", "COST_USD": "${:,.2f}"}),
@@ -1388,7 +1668,7 @@ def show_user_spend_attribution(data_source, lookback_days, credit_cost):
         hide_index=True,
     )
 
-def show_12_month_forecast(data_source, credit_cost, df):
+def show_12_month_forecast(data_source, credit_cost, df, usage):
     """Primary view: forecast current usage out 12 months (ML.FORECAST when available)."""
     st.header("12-Month Forecast")
 
@@ -1404,39 +1684,34 @@ def show_12_month_forecast(data_source, credit_cost, df):
     # ------------------------------------------------------------------------
     # Preferred path: ML forecast from Snowflake (same-account deployments)
     # ------------------------------------------------------------------------
-    if data_source == "Query Views (Same Account)":
-        try:
-            with st.spinner("Loading ML forecast..."):
-                fdf = fetch_ml_forecast_12m()
-        except Exception as e:
-            fdf = pd.DataFrame()
-            st.warning(f"Unable to query ML forecast view: {str(e)}")
+    # Every tab body runs on each rerun, so hold the query until the user asks for it
+    ml_forecast_requested = st.session_state.get("ml_forecast_requested", False)
+    if data_source == "Query Views (Same Account)" and not ml_forecast_requested:
+        if st.button("Load ML forecast", help="Query V_USAGE_FORECAST_12M (SNOWFLAKE.ML.FORECAST)"):
+            st.session_state.ml_forecast_requested = True
+            ml_forecast_requested = True
+        else:
+            st.caption("Showing a simple projection from historical data. Load the ML forecast for model-based estimates.")
+
+    if data_source == "Query Views (Same Account)" and ml_forecast_requested:
+        with st.spinner("Loading ML forecast..."):
+            fdf = _fetch_with_stale_fallback("forecast", fetch_ml_forecast_12m)
 
         if fdf is not None and not fdf.empty:
             fdf.columns = fdf.columns.str.upper()
-            fdf["FORECAST_DATE"] = pd.to_datetime(fdf["FORECAST_DATE"])
 
-            # Filter to requested horizon from first forecast date
-            start_date = fdf["FORECAST_DATE"].min()
-            end_date = start_date + pd.Timedelta(days=projection_days)
-            fdf = fdf[(fdf["FORECAST_DATE"] >= start_date) & (fdf["FORECAST_DATE"] < end_date)].copy()
+            # Filter to the requested number of calendar months from the first forecast month
+            horizon_months = np.sort(fdf["MONTH"].unique())[:projection_months]
+            monthly = fdf[fdf["MONTH"].isin(horizon_months)]
 
-            if fdf.empty:
+            if monthly.empty:
                 st.warning("ML forecast returned no rows for the selected horizon.")
             else:
                 st.caption("Forecast produced by Snowflake ML forecasting (`SNOWFLAKE.ML.FORECAST`).")
 
-                # Monthly rollup (credits + bounds)
-                fdf["MONTH"] = fdf["FORECAST_DATE"].dt.to_period("M").dt.to_timestamp()
-
-                monthly = (
-                    fdf.groupby(["MONTH", "SERVICE_TYPE"], as_index=False)[
-                        ["FORECAST_CREDITS", "LOWER_BOUND_CREDITS", "UPPER_BOUND_CREDITS"]
-                    ]
-                    .sum()
-                )
+                # Total across services for each month (credits + bounds); already monthly from SQL
                 monthly_total = (
-                    monthly.groupby("MONTH", as_index=False)[
+                    monthly.groupby("MONTH", as_index=False, sort=False)[
                         ["FORECAST_CREDITS", "LOWER_BOUND_CREDITS", "UPPER_BOUND_CREDITS"]
                     ]
                     .sum()
@@ -1527,32 +1802,34 @@ def show_12_month_forecast(data_source, credit_cost, df):
         st.warning("No historical data available to project.")
         return
 
-    df_local = df.copy()
-    df_local.columns = df_local.columns.str.upper()
-    if "DATE" not in df_local.columns:
-        st.warning("Expected a DATE column in the historical dataset.")
-        return
-
-    df_local["DATE"] = pd.to_datetime(df_local["DATE"])
-    daily_total = df_local.groupby("DATE", as_index=False)["TOTAL_CREDITS"].sum().sort_values("DATE")
+    # Daily totals come from the cached usage summary rather than another groupby per rerun
+    daily_total = usage["daily_credits"]
 
     if len(daily_total) < 7:
         st.warning("Not enough historical data points to create a meaningful projection (need at least 7 days).")
         return
 
     # Linear trend on daily totals (simple, transparent fallback)
-    x = np.arange(len(daily_total))
-    y = daily_total["TOTAL_CREDITS"].values.astype(float)
-    slope, intercept = np.polyfit(x, y, deg=1)
-
-    last_date = daily_total["DATE"].max()
+    # Closed-form least squares on the day index instead of a polyfit/lstsq call
+    x = np.arange(len(daily_total), dtype=float)
+    y = daily_total.to_numpy(dtype=float)
+    x_centered = x - x.mean()
+    slope = float(x_centered @ (y - y.mean()) / (x_centered @ x_centered))
+    intercept = float(y.mean() - slope * x.mean())
+
+    last_date = daily_total.index.max()
     future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=projection_days, freq="D")
     x_future = np.arange(len(daily_total), len(daily_total) + len(future_dates))
     y_future = np.maximum(0, intercept + slope * x_future)
 
-    proj = pd.DataFrame({"DATE": future_dates, "FORECAST_CREDITS": y_future})
-    proj["MONTH"] = proj["DATE"].dt.to_period("M").dt.to_timestamp()
-    monthly = proj.groupby("MONTH", as_index=False)["FORECAST_CREDITS"].sum()
+    # Bucket each projected day into its calendar month by index arithmetic and sum with bincount
+    first_date = future_dates[0]
+    month_idx = (future_dates.year - first_date.year) * 12 + (future_dates.month - first_date.month)
+    monthly_credits = np.bincount(month_idx, weights=y_future)
+    monthly = pd.DataFrame({
+        "MONTH": pd.date_range(start=first_date.replace(day=1), periods=len(monthly_credits), freq="MS"),
+        "FORECAST_CREDITS": monthly_credits,
+    })
     monthly["FORECAST_COST_USD"] = monthly["FORECAST_CREDITS"] * credit_cost
 
     st.caption("Fallback forecast: simple linear trend extrapolation on daily total credits.")
@@ -1572,15 +1849,15 @@ def show_12_month_forecast(data_source, credit_cost, df):
         hide_index=True,
     )
 
-def show_historical_analysis(df, credit_cost):
+def show_historical_analysis(df, credit_cost, usage):
     """Display historical analysis tab"""
     st.header("Historical Usage Analysis")
 
     # Summary statistics
-    total_credits = df['TOTAL_CREDITS'].sum()
+    total_credits = usage['total_credits']
     total_cost = total_credits * credit_cost
-    avg_daily_credits = df.groupby('DATE')['TOTAL_CREDITS'].sum().mean()
-    avg_daily_users = df['DAILY_UNIQUE_USERS'].mean()
+    avg_daily_credits = usage['avg_daily_credits']
+    avg_daily_users = usage['avg_daily_users']
 
     col1, col2, col3, col4 = st.columns(4)
 
@@ -1603,8 +1880,12 @@ def show_historical_analysis(df, credit_cost):
     df_with_30d = calculate_30day_totals(df)
 
     if not df_with_30d.empty:
-        # Get most recent 30-day totals by service
-        latest_30d = df_with_30d.groupby('SERVICE_TYPE').last().reset_index()
+        # Get most recent 30-day totals by service: rows arrive newest-first, so the
+        # first row kept per service is its latest window
+        latest_30d = (
+            df_with_30d.drop_duplicates('SERVICE_TYPE', keep='first')
+            .sort_values('SERVICE_TYPE', ignore_index=True)
+        )
         latest_30d['COST_30D_USD'] = latest_30d['credits_30d_total'] * credit_cost
         latest_30d['COST_PER_USER_30D_USD'] = latest_30d['cost_per_user_30d'] * credit_cost
 
@@ -1647,11 +1928,7 @@ def show_historical_analysis(df, credit_cost):
 
     # Service breakdown
     st.subheader("Service Breakdown")
-    service_agg = df.groupby('SERVICE_TYPE').agg({
-        'TOTAL_CREDITS': 'sum',
-        'DAILY_UNIQUE_USERS': 'mean',
-        'TOTAL_OPERATIONS': 'sum'
-    }).reset_index()
+    service_agg = usage['service_totals'][['TOTAL_CREDITS', 'DAILY_UNIQUE_USERS', 'TOTAL_OPERATIONS']].reset_index()
     service_agg['TOTAL_COST_USD'] = service_agg['TOTAL_CREDITS'] * credit_cost
     service_agg = service_agg.sort_values('TOTAL_CREDITS', ascending=False)
 
@@ -1682,76 +1959,146 @@ def show_historical_analysis(df, credit_cost):
     # Usage trends
     st.subheader("Usage Trends")
 
-    daily_totals = df.groupby(['DATE', 'SERVICE_TYPE'])['TOTAL_CREDITS'].sum().reset_index()
+    daily_totals = usage['daily_service_credits']
 
+    # WebGL traces + point cap keep long histories responsive in the browser
     fig = px.line(
-        daily_totals,
+        _maybe_downsample(daily_totals, 'DATE'),
         x='DATE',
         y='TOTAL_CREDITS',
         color='SERVICE_TYPE',
-        title='Daily Credits Usage by Service'
+        title='Daily Credits Usage by Service',
+        render_mode='webgl'
     )
     fig.update_layout(hovermode='x unified')
     st.plotly_chart(fig, use_container_width=True)
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_data(ttl=CACHE_TTL_SECONDS["aisql"])
 def fetch_aisql_data():
     """Fetch all AISQL data in one go (cached for performance)"""
+    # Function Summary - LIMIT to top 50 for performance
+    function_summary_query = """
+        SELECT
+            function_name,
+            model_name,
+            call_count,
+            total_credits,
+            total_tokens,
+            avg_credits_per_call,
+            avg_tokens_per_call,
+            cost_per_million_tokens,
+            serverless_calls,
+            compute_calls
+        FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_FUNCTION_SUMMARY
+        ORDER BY total_credits DESC
+        LIMIT 50
+    """
+
+    # Top Functions - rolled up across models in the warehouse, over all rows rather
+    # than just the top-50 function/model pairs above
+    top_functions_query = """
+        SELECT
+            function_name,
+            SUM(call_count) AS call_count,
+            SUM(total_credits) AS total_credits,
+            SUM(total_tokens) AS total_tokens,
+            SUM(serverless_calls) AS serverless_calls,
+            SUM(compute_calls) AS compute_calls
+        FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_FUNCTION_SUMMARY
+        GROUP BY function_name
+        ORDER BY total_credits DESC
+        LIMIT 10
+    """
+
+    # Model Comparison
+    model_comparison_query = """
+        SELECT
+            model_name,
+            functions_used,
+            total_calls,
+            total_credits,
+            total_tokens,
+            avg_credits_per_call,
+            cost_per_million_tokens,
+            median_credits,
+            p90_credits
+        FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_MODEL_COMPARISON
+        ORDER BY total_credits DESC
+        LIMIT 20
+    """
+
+    # Daily Trends - LIMIT to last 30 days and top functions
+    daily_trends_query = """
+        SELECT
+            usage_date,
+            function_name,
+            model_name,
+            daily_credits,
+            daily_tokens,
+            serverless_calls,
+            compute_calls
+        FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_DAILY_TRENDS
+        WHERE usage_date >= DATEADD('day', -30, CURRENT_DATE())
+        ORDER BY usage_date DESC, daily_credits DESC
+        LIMIT 500
+    """
+
     try:
-        # Function Summary - LIMIT to top 50 for performance
-        function_summary_df = session.sql("""
-            SELECT
-                function_name,
-                model_name,
-                call_count,
-                total_credits,
-                total_tokens,
-                avg_credits_per_call,
-                avg_tokens_per_call,
-                cost_per_million_tokens,
-                serverless_calls,
-                compute_calls
-            FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_FUNCTION_SUMMARY
-            ORDER BY total_credits DESC
-            LIMIT 50
-        """).to_pandas()
-
-        # Model Comparison
-        model_comparison_df = session.sql("""
-            SELECT
-                model_name,
-                functions_used,
-                total_calls,
-                total_credits,
-                total_tokens,
-                avg_credits_per_call,
-                cost_per_million_tokens,
-                median_credits,
-                p90_credits
-            FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_MODEL_COMPARISON
-            ORDER BY total_credits DESC
-            LIMIT 20
-        """).to_pandas()
-
-        # Daily Trends - LIMIT to last 30 days and top functions
-        daily_trends_df = session.sql("""
-            SELECT
-                usage_date,
-                function_name,
-                model_name,
-                daily_credits,
-                daily_tokens,
-                serverless_calls,
-                compute_calls
-            FROM SNOWFLAKE_EXAMPLE.CORTEX_USAGE.V_AISQL_DAILY_TRENDS
-            WHERE usage_date >= DATEADD('day', -30, CURRENT_DATE())
-            ORDER BY usage_date DESC, daily_credits DESC
-            LIMIT 500
-        """).to_pandas()
-
-        return function_summary_df, model_comparison_df, daily_trends_df
+        # The queries are independent; submit them together so the tab waits on
+        # the slowest query rather than the sum of all the round-trips
+        queries = (function_summary_query, top_functions_query, model_comparison_query, daily_trends_query)
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            futures = [pool.submit(lambda q: session.sql(q).to_pandas(), query) for query in queries]
+            function_summary_df, top_functions_df, model_comparison_df, daily_trends_df = [f.result() for f in futures]
+
+        # A few dozen functions/models repeat across these rows; categorical codes
+        # let the heatmap and trend groupbys hash ints instead of strings
+        for frame in (function_summary_df, daily_trends_df):
+            for col in ('FUNCTION_NAME', 'MODEL_NAME'):
+                frame[col] = frame[col].astype('category')
+
+        return function_summary_df, top_functions_df, model_comparison_df, daily_trends_df
     except Exception as e:
-        return None, None, None
+        return None, None, None, None
+
+@st.cache_data(ttl=600, max_entries=10)
+def build_model_scatter(model_comparison_df):
+    """Calls vs credits bubble chart per model, cached on its data"""
+    fig = px.scatter(
+        model_comparison_df,
+        x='TOTAL_CALLS',
+        y='TOTAL_CREDITS',
+        size='TOTAL_TOKENS',
+        color='MODEL_NAME',
+        title='Model Usage: Calls vs Credits (bubble size = tokens)',
+        labels={
+            'TOTAL_CALLS': 'Total Calls',
+            'TOTAL_CREDITS': 'Total Credits',
+            'MODEL_NAME': 'Model'
+        },
+        hover_data=['FUNCTIONS_USED', 'AVG_CREDITS_PER_CALL', 'COST_PER_MILLION_TOKENS']
+    )
+    fig.update_traces(marker=dict(sizemode='diameter', sizeref=model_comparison_df['TOTAL_TOKENS'].max()/1e6))
+    return fig
+
+@st.cache_data(ttl=600, max_entries=10)
+def build_function_model_heatmap(function_summary_df):
+    """Function x model credit heatmap, cached on its data"""
+    # groupby + unstack avoids pivot_table's overhead
+    heatmap_data = (
+        function_summary_df.groupby(['FUNCTION_NAME', 'MODEL_NAME'], observed=True)['TOTAL_CREDITS'].sum()
+        .unstack(fill_value=0)
+    )
+
+    fig = px.imshow(
+        heatmap_data,
+        labels=dict(x="Model", y="Function", color="Credits"),
+        title="Credit Usage by Function and Model",
+        color_continuous_scale='YlOrRd',
+        aspect='auto'
+    )
+    fig.update_xaxes(side='bottom')
+    return fig
 
 def show_aisql_functions(credit_cost):
     """Display AISQL Functions analysis tab (NEW in v2.5)"""
@@ -1763,7 +2110,7 @@ def show_aisql_functions(credit_cost):
     # ========================================================================
 
     with st.spinner("Loading AISQL data..."):
-        function_summary_df, model_comparison_df, daily_trends_df = fetch_aisql_data()
+        function_summary_df, top_functions, model_comparison_df, daily_trends_df = fetch_aisql_data()
 
     if function_summary_df is None:
         st.error("Unable to load AISQL function data.")
@@ -1825,17 +2172,8 @@ def show_aisql_functions(credit_cost):
 
     st.subheader("Top Functions by Cost")
 
-    # Aggregate by function (across all models)
-    top_functions = function_summary_df.groupby('FUNCTION_NAME').agg({
-        'CALL_COUNT': 'sum',
-        'TOTAL_CREDITS': 'sum',
-        'TOTAL_TOKENS': 'sum',
-        'SERVERLESS_CALLS': 'sum',
-        'COMPUTE_CALLS': 'sum'
-    }).reset_index()
-
+    # Aggregated by function (across all models) and ranked in the warehouse
     top_functions['COST_USD'] = top_functions['TOTAL_CREDITS'] * credit_cost
-    top_functions = top_functions.sort_values('TOTAL_CREDITS', ascending=False).head(10)
 
     # Bar chart
     fig_functions = px.bar(
@@ -1875,28 +2213,13 @@ def show_aisql_functions(credit_cost):
     if not model_comparison_df.empty:
         st.subheader("Model Comparison")
 
+        # Scatter plot: Cost vs Usage (built before the cost columns so the slider doesn't rebuild it)
+        st.plotly_chart(build_model_scatter(model_comparison_df), use_container_width=True)
+
         # Prepare data
         model_comparison_df['COST_USD'] = model_comparison_df['TOTAL_CREDITS'] * credit_cost
         model_comparison_df['COST_PER_MILLION_USD'] = model_comparison_df['COST_PER_MILLION_TOKENS'] * credit_cost
 
-        # Scatter plot: Cost vs Usage
-        fig_models = px.scatter(
-            model_comparison_df,
-            x='TOTAL_CALLS',
-            y='TOTAL_CREDITS',
-            size='TOTAL_TOKENS',
-            color='MODEL_NAME',
-            title='Model Usage: Calls vs Credits (bubble size = tokens)',
-            labels={
-                'TOTAL_CALLS': 'Total Calls',
-                'TOTAL_CREDITS': 'Total Credits',
-                'MODEL_NAME': 'Model'
-            },
-            hover_data=['FUNCTIONS_USED', 'AVG_CREDITS_PER_CALL', 'COST_PER_MILLION_TOKENS']
-        )
-        fig_models.update_traces(marker=dict(sizemode='diameter', sizeref=model_comparison_df['TOTAL_TOKENS'].max()/1e6))
-        st.plotly_chart(fig_models, use_container_width=True)
-
         # Model comparison table
         st.markdown("**Model Details**")
         display_cols_model = ['MODEL_NAME', 'FUNCTIONS_USED', 'TOTAL_CALLS', 'TOTAL_CREDITS',
@@ -1921,24 +2244,7 @@ def show_aisql_functions(credit_cost):
     # ========================================================================
 
     with st.expander("Function-Model Usage Heatmap", expanded=False):
-        # Create pivot table for heatmap
-        heatmap_data = function_summary_df.pivot_table(
-            index='FUNCTION_NAME',
-            columns='MODEL_NAME',
-            values='TOTAL_CREDITS',
-            fill_value=0
-        )
-
-        # Create heatmap
-        fig_heatmap = px.imshow(
-            heatmap_data,
-            labels=dict(x="Model", y="Function", color="Credits"),
-            title="Credit Usage by Function and Model",
-            color_continuous_scale='YlOrRd',
-            aspect='auto'
-        )
-        fig_heatmap.update_xaxes(side='bottom')
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+        st.plotly_chart(build_function_model_heatmap(function_summary_df), use_container_width=True)
 
     st.markdown("---")
 
@@ -1948,11 +2254,12 @@ def show_aisql_functions(credit_cost):
 
     if not daily_trends_df.empty:
         with st.expander("Daily Usage Trends (Last 30 Days)", expanded=False):
-            # Aggregate by date and function
-            daily_agg = daily_trends_df.groupby(['USAGE_DATE', 'FUNCTION_NAME']).agg({
-                'DAILY_CREDITS': 'sum',
-                'DAILY_TOKENS': 'sum'
-            }).reset_index()
+            # Aggregate by date and function; only the aggregated rows are put in plot order
+            daily_agg = (
+                daily_trends_df.groupby(['USAGE_DATE', 'FUNCTION_NAME'], sort=False, observed=True)['DAILY_CREDITS'].sum()
+                .reset_index()
+                .sort_values(['USAGE_DATE', 'FUNCTION_NAME'], ignore_index=True)
+            )
 
             # Line chart
             fig_trends = px.line(
@@ -1975,11 +2282,12 @@ def show_aisql_functions(credit_cost):
     with st.expander("Detailed Function-Model Breakdown", expanded=False):
         st.markdown("**Complete data table with all metrics**")
 
-        # Prepare detailed table
-        detailed_df = function_summary_df.copy()
-        detailed_df['COST_USD'] = detailed_df['TOTAL_CREDITS'] * credit_cost
-        detailed_df['COST_PER_MILLION_USD'] = detailed_df['COST_PER_MILLION_TOKENS'] * credit_cost
-        detailed_df = detailed_df.sort_values('TOTAL_CREDITS', ascending=False)
+        # Prepare detailed table: one new frame with both cost columns; rows already
+        # arrive ordered by total credits from fetch_aisql_data
+        detailed_df = function_summary_df.assign(
+            COST_USD=function_summary_df['TOTAL_CREDITS'] * credit_cost,
+            COST_PER_MILLION_USD=function_summary_df['COST_PER_MILLION_TOKENS'] * credit_cost,
+        )
 
         display_cols_detailed = [
             'FUNCTION_NAME', 'MODEL_NAME', 'CALL_COUNT', 'TOTAL_CREDITS', 'COST_USD',
@@ -2003,10 +2311,9 @@ def show_aisql_functions(credit_cost):
         )
 
         # Download button
-        csv = detailed_df.to_csv(index=False)
         st.download_button(
             label="Download AISQL Data as CSV",
-            data=csv,
+            data=_csv_bytes(detailed_df),
             file_name=f"aisql_function_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )
@@ -2014,7 +2321,59 @@ def show_aisql_functions(credit_cost):
     st.markdown("---")
     st.info("Tip: Use this data to optimize your AISQL function usage and choose the most cost-effective models for your use case.")
 
-def show_cost_projections(df, credit_cost, variance_pct):
+@st.cache_data
+def _rates_reference_df():
+    """Published per-service rates shown under the rate tabs; static, so cached once per process"""
+    return pd.DataFrame([
+        {
+            'Service': 'AI Parse Document (Layout)',
+            'Rate': '3.33 credits per 1,000 pages',
+            'Access Method': 'SQL + API',
+            'Metric': 'Pages processed',
+            'Your Data': 'V_DOCUMENT_AI_DETAIL view'
+        },
+        {
+            'Service': 'AI Parse Document (OCR)',
+            'Rate': '0.5 credits per 1,000 pages',
+            'Access Method': 'SQL + API',
+            'Metric': 'Pages processed',
+            'Your Data': 'V_DOCUMENT_AI_DETAIL view'
+        },
+        {
+            'Service': 'Cortex Analyst',
+            'Rate': '67 credits per 1,000 messages (0.067/msg)',
+            'Access Method': 'API only',
+            'Metric': 'Messages/requests',
+            'Your Data': 'V_CORTEX_ANALYST_DETAIL view'
+        },
+        {
+            'Service': 'Cortex Search',
+            'Rate': '6.3 credits per GB/month',
+            'Access Method': 'SQL + API',
+            'Metric': 'Indexed data size',
+            'Your Data': 'V_CORTEX_SEARCH_DETAIL view'
+        },
+        {
+            'Service': 'AISQL Functions',
+            'Rate': 'Varies by model & tokens (see tabs above)',
+            'Access Method': 'SQL + API',
+            'Metric': 'Tokens processed',
+            'Your Data': 'V_AISQL_FUNCTION_SUMMARY view'
+        }
+    ])
+
+@st.cache_data
+def _usage_coverage_df():
+    """Coverage matrix for the methodology expander: what ACCOUNT_USAGE tracks for SQL vs REST API usage"""
+    return pd.DataFrame([
+        {'Feature': 'Total AI services credits', 'SQL Functions': 'Yes (metering validation)', 'REST API': 'Yes (metering validation)'},
+        {'Feature': 'Function & model breakdown', 'SQL Functions': 'Yes (CORTEX_AISQL_USAGE_HISTORY)', 'REST API': 'Limited'},
+        {'Feature': 'Per-query details', 'SQL Functions': 'Yes (QUERY_ID level)', 'REST API': 'Not available'},
+        {'Feature': 'User attribution', 'SQL Functions': 'Yes (QUERY_HISTORY join)', 'REST API': 'Not available'},
+        {'Feature': 'Historical trend analysis', 'SQL Functions': 'Yes (full detail)', 'REST API': 'Yes (metering totals)'}
+    ])
+
+def show_cost_projections(df, credit_cost, variance_pct, usage):
     """Display cost projections tab"""
     st.header("Cost Projections")
 
@@ -2200,43 +2559,7 @@ def show_cost_projections(df, credit_cost, variance_pct):
                 hide_index=True
             )
 
-        rates_data = pd.DataFrame([
-            {
-                'Service': 'AI Parse Document (Layout)',
-                'Rate': '3.33 credits per 1,000 pages',
-                'Access Method': 'SQL + API',
-                'Metric': 'Pages processed',
-                'Your Data': 'V_DOCUMENT_AI_DETAIL view'
-            },
-            {
-                'Service': 'AI Parse Document (OCR)',
-                'Rate': '0.5 credits per 1,000 pages',
-                'Access Method': 'SQL + API',
-                'Metric': 'Pages processed',
-                'Your Data': 'V_DOCUMENT_AI_DETAIL view'
-            },
-            {
-                'Service': 'Cortex Analyst',
-                'Rate': '67 credits per 1,000 messages (0.067/msg)',
-                'Access Method': 'API only',
-                'Metric': 'Messages/requests',
-                'Your Data': 'V_CORTEX_ANALYST_DETAIL view'
-            },
-            {
-                'Service': 'Cortex Search',
-                'Rate': '6.3 credits per GB/month',
-                'Access Method': 'SQL + API',
-                'Metric': 'Indexed data size',
-                'Your Data': 'V_CORTEX_SEARCH_DETAIL view'
-            },
-            {
-                'Service': 'AISQL Functions',
-                'Rate': 'Varies by model & tokens (see tabs above)',
-                'Access Method': 'SQL + API',
-                'Metric': 'Tokens processed',
-                'Your Data': 'V_AISQL_FUNCTION_SUMMARY view'
-            }
-        ])
+        rates_data = _rates_reference_df()
 
         st.dataframe(
             rates_data,
@@ -2267,55 +2590,41 @@ def show_cost_projections(df, credit_cost, variance_pct):
             st.markdown("---")
             st.markdown("**Your Actual Consumption Rates (from ACCOUNT_USAGE)**")
 
-            actual_rates = []
-
-            for service in df['SERVICE_TYPE'].unique():
-                service_data = df[df['SERVICE_TYPE'] == service]
-                total_credits = service_data['TOTAL_CREDITS'].sum()
-                total_ops = service_data['TOTAL_OPERATIONS'].sum()
-
-                if total_ops > 0:
-                    rate_per_op = total_credits / total_ops
-
-                    # Add service-specific context
-                    if 'Analyst' in service:
-                        expected = 0.067  # 0.067 credits per message
-                        display_rate = f'{rate_per_op:.4f} credits per message'
-                        metric = 'messages'
-                    elif 'Document' in service:
-                        rate_per_1000 = rate_per_op * 1000
-                        expected = 1.915  # Average of Layout (3.33) and OCR (0.5) per 1,000 pages
-                        display_rate = f'{rate_per_1000:.2f} credits per 1,000 pages'
-                        metric = 'pages'
-                    elif 'Search' in service:
-                        expected = None  # GB-based, different metric
-                        display_rate = f'{rate_per_op:.4f} credits per operation'
-                        metric = 'operations'
-                    else:
-                        expected = None
-                        display_rate = f'{rate_per_op:.4f} credits per operation'
-                        metric = 'operations'
-
-                    # Check if within range (+/-50% tolerance)
-                    if expected:
-                        actual_value = rate_per_op if 'Analyst' in service else rate_per_op * 1000
-                        within_range = abs(actual_value - expected) / expected < 0.5
-                        status = 'Within range' if within_range else 'Verify'
-                    else:
-                        status = 'No baseline'
-
-                    actual_rates.append({
-                        'Service': service,
-                        'Your Rate': display_rate,
-                        'Total Operations': f'{total_ops:,.0f}',
-                        'Total Credits': f'{total_credits:.4f}',
-                        'Status': status
-                    })
-
-            if actual_rates:
-                actual_rates_df = pd.DataFrame(actual_rates)
+            # One pass for per-service totals; services without operations have no rate
+            service_rates = df.groupby('SERVICE_TYPE', sort=False, observed=True)[['TOTAL_CREDITS', 'TOTAL_OPERATIONS']].sum()
+            service_rates = service_rates[service_rates['TOTAL_OPERATIONS'] > 0]
+
+            if not service_rates.empty:
+                services = service_rates.index.astype(str)
+                rate_per_op = (service_rates['TOTAL_CREDITS'] / service_rates['TOTAL_OPERATIONS']).to_numpy()
+
+                # Service-specific context from the baseline table, resolved for all services at once
+                matches = [services.str.contains(key) for key in OBSERVED_RATE_BASELINES]
+                baselines = list(OBSERVED_RATE_BASELINES.values())
+                shown_rate = rate_per_op * np.select(matches, [b['scale'] for b in baselines], 1)
+                rate_decimals = np.select(matches, [b['decimals'] for b in baselines], 4)
+                rate_units = np.select(matches, [b['unit'] for b in baselines], 'credits per operation')
+                expected = np.select(matches, [b['expected'] for b in baselines], np.nan)
+
+                # Check if within range (+/-50% tolerance)
+                has_baseline = ~np.isnan(expected)
+                within_range = np.abs(shown_rate - expected) < 0.5 * expected
+
+                actual_rates_df = pd.DataFrame({
+                    'Service': services,
+                    'Your Rate': [
+                        f'{rate:.{decimals}f} {unit}'
+                        for rate, decimals, unit in zip(shown_rate, rate_decimals, rate_units)
+                    ],
+                    'Total Operations': service_rates['TOTAL_OPERATIONS'].to_numpy(),
+                    'Total Credits': service_rates['TOTAL_CREDITS'].to_numpy(),
+                    'Status': np.select([within_range, has_baseline], ['Within range', 'Verify'], 'No baseline'),
+                })
                 st.dataframe(
-                    actual_rates_df,
+                    actual_rates_df.style.format({
+                        'Total Operations': '{:,.0f}',
+                        'Total Credits': '{:.4f}'
+                    }),
                     use_container_width=True,
                     hide_index=True
                 )
@@ -2346,13 +2655,7 @@ def show_cost_projections(df, credit_cost, variance_pct):
         **What This Means:**
         """)
 
-        comparison_data = pd.DataFrame([
-            {'Feature': 'Total AI services credits', 'SQL Functions': 'Yes (metering validation)', 'REST API': 'Yes (metering validation)'},
-            {'Feature': 'Function & model breakdown', 'SQL Functions': 'Yes (CORTEX_AISQL_USAGE_HISTORY)', 'REST API': 'Limited'},
-            {'Feature': 'Per-query details', 'SQL Functions': 'Yes (QUERY_ID level)', 'REST API': 'Not available'},
-            {'Feature': 'User attribution', 'SQL Functions': 'Yes (QUERY_HISTORY join)', 'REST API': 'Not available'},
-            {'Feature': 'Historical trend analysis', 'SQL Functions': 'Yes (full detail)', 'REST API': 'Yes (metering totals)'}
-        ])
+        comparison_data = _usage_coverage_df()
 
         st.dataframe(comparison_data, use_container_width=True, hide_index=True)
 
@@ -2375,7 +2678,7 @@ def show_cost_projections(df, credit_cost, variance_pct):
     st.subheader("Cost per User Calculator")
     st.markdown("**Estimate per-user costs based on usage patterns**")
 
-    show_cost_per_user_calculator(df, credit_cost)
+    show_cost_per_user_calculator(df, credit_cost, usage)
 
     st.divider()
     st.divider()
@@ -2403,15 +2706,13 @@ def show_cost_projections(df, credit_cost, variance_pct):
             value=25
         ) / 100
 
-    # Calculate projection
-    projection_df = calculate_growth_projection(df, growth_rate, projection_months, credit_cost)
+    # Calculate projection (monthly totals, indexed by month)
+    monthly_cost = calculate_monthly_projection(usage['service_totals'], growth_rate, projection_months, credit_cost)
 
-    # Summary metrics
-    monthly_totals = projection_df.groupby('month')['projected_cost_usd'].sum().reset_index()
-
-    month_1_cost = monthly_totals[monthly_totals['month'] == 1]['projected_cost_usd'].iloc[0] if len(monthly_totals) > 0 else 0
-    month_12_cost = monthly_totals[monthly_totals['month'] == 12]['projected_cost_usd'].iloc[0] if len(monthly_totals) >= 12 else 0
-    total_year_cost = monthly_totals['projected_cost_usd'].sum()
+    # Month-indexed lookups (0 when the horizon is shorter than the month asked for)
+    month_1_cost = monthly_cost.get(1, 0)
+    month_12_cost = monthly_cost.get(12, 0)
+    total_year_cost = monthly_cost.sum()
 
     st.divider()
 
@@ -2429,51 +2730,59 @@ def show_cost_projections(df, credit_cost, variance_pct):
 
     st.divider()
 
-    # Projection chart
-    fig = go.Figure()
-
-    monthly_totals['lower_bound'] = monthly_totals['projected_cost_usd'] * (1 - variance_pct)
-    monthly_totals['upper_bound'] = monthly_totals['projected_cost_usd'] * (1 + variance_pct)
-
-    fig.add_trace(go.Scatter(
-        x=monthly_totals['month'],
-        y=monthly_totals['upper_bound'],
-        mode='lines',
-        name=f'Upper (+{variance_pct*100:.0f}%)',
-        line=dict(width=0),
-        showlegend=True
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=monthly_totals['month'],
-        y=monthly_totals['lower_bound'],
-        mode='lines',
-        name=f'Lower (-{variance_pct*100:.0f}%)',
-        line=dict(width=0),
-        fillcolor='rgba(41, 181, 232, 0.2)',
-        fill='tonexty',
-        showlegend=True
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=monthly_totals['month'],
-        y=monthly_totals['projected_cost_usd'],
-        mode='lines+markers',
-        name='Projected Cost',
-        line=dict(color='#29B5E8', width=3)
-    ))
-
-    fig.update_layout(
-        title='Cost Projection with Variance Range',
-        xaxis_title='Month',
-        yaxis_title='Projected Cost (USD)',
-        hovermode='x unified'
+    # Variance bands as plain arrays; the breakdown table below is built from them in one go
+    months = monthly_cost.index.to_numpy()
+    projected = monthly_cost.to_numpy()
+    lower_bound = projected * (1 - variance_pct)
+    upper_bound = projected * (1 + variance_pct)
+
+    # Projection chart: traces and layout handed to a single Figure constructor
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=months,
+                y=upper_bound,
+                mode='lines',
+                name=f'Upper (+{variance_pct*100:.0f}%)',
+                line=dict(width=0),
+                showlegend=True
+            ),
+            go.Scatter(
+                x=months,
+                y=lower_bound,
+                mode='lines',
+                name=f'Lower (-{variance_pct*100:.0f}%)',
+                line=dict(width=0),
+                fillcolor='rgba(41, 181, 232, 0.2)',
+                fill='tonexty',
+                showlegend=True
+            ),
+            go.Scatter(
+                x=months,
+                y=projected,
+                mode='lines+markers',
+                name='Projected Cost',
+                line=dict(color='#29B5E8', width=3)
+            ),
+        ],
+        layout=go.Layout(
+            title='Cost Projection with Variance Range',
+            xaxis_title='Month',
+            yaxis_title='Projected Cost (USD)',
+            hovermode='x unified'
+        )
     )
 
     st.plotly_chart(fig, use_container_width=True)
 
     # Detailed table
     st.subheader("Monthly Breakdown")
+    monthly_totals = pd.DataFrame({
+        'month': months,
+        'projected_cost_usd': projected,
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound,
+    })
     st.dataframe(
         monthly_totals.style.format({
             'projected_cost_usd': '${:,.2f}',
@@ -2483,7 +2792,7 @@ def show_cost_projections(df, credit_cost, variance_pct):
         use_container_width=True
     )
 
-def show_cost_per_user_calculator(df, credit_cost):
+def show_cost_per_user_calculator(df, credit_cost, usage):
     """
     Simplified calculator for cost per user estimation
     Shows: persona name, user count, requests per day, cost per request
@@ -2492,26 +2801,22 @@ def show_cost_per_user_calculator(df, credit_cost):
     # Calculate historical baseline metrics from usage data
     # Use a more robust aggregation approach that handles sparse data better
 
-    # Aggregate by service type across all available dates
-    latest_30d = df.groupby('SERVICE_TYPE').agg({
-        'TOTAL_OPERATIONS': 'sum',
-        'DAILY_UNIQUE_USERS': 'mean',
-        'TOTAL_CREDITS': 'sum',
-        'DATE': 'count'  # Count number of days with data
-    }).reset_index()
-
-    # Rename DATE count to days_with_data for clarity
-    latest_30d.rename(columns={'DATE': 'days_with_data'}, inplace=True)
+    # Per-service totals across all available dates, from the cached usage summary
+    latest_30d = (
+        usage['service_totals'][['TOTAL_OPERATIONS', 'DAILY_UNIQUE_USERS', 'TOTAL_CREDITS', 'DAYS_WITH_DATA']]
+        .reset_index()
+        .rename(columns={'DAYS_WITH_DATA': 'days_with_data'})
+    )
 
     # Calculate average requests per day based on actual days with data
     latest_30d['requests_per_day'] = latest_30d['TOTAL_OPERATIONS'] / latest_30d['days_with_data']
     latest_30d['users_in_env'] = latest_30d['DAILY_UNIQUE_USERS']
 
-    # Calculate cost per request (handle division by zero)
-    latest_30d['cost_per_request'] = latest_30d.apply(
-        lambda row: (row['TOTAL_CREDITS'] * credit_cost) / row['TOTAL_OPERATIONS']
-        if row['TOTAL_OPERATIONS'] > 0 else 0,
-        axis=1
+    # Calculate cost per request (0 for services with no operations)
+    service_cost = latest_30d['TOTAL_CREDITS'].to_numpy(dtype=float) * credit_cost
+    service_ops = latest_30d['TOTAL_OPERATIONS'].to_numpy(dtype=float)
+    latest_30d['cost_per_request'] = np.divide(
+        service_cost, service_ops, out=np.zeros_like(service_cost), where=service_ops > 0
     )
 
     # ========================================================================
@@ -2548,28 +2853,32 @@ def show_cost_per_user_calculator(df, credit_cost):
                     "- Significant deviation"
                 )
 
+        # Checks 2 and 3 only need the flagged service names, so mask the name array directly
+        service_names = latest_30d['SERVICE_TYPE'].to_numpy()
+
         # Check 2: Verify no division by zero issues
-        zero_ops = latest_30d[latest_30d['TOTAL_OPERATIONS'] == 0]
-        if not zero_ops.empty:
-            st.error(f"Found {len(zero_ops)} service(s) with 0 operations: {', '.join(zero_ops['SERVICE_TYPE'].tolist())}")
+        zero_ops = service_names[latest_30d['TOTAL_OPERATIONS'].to_numpy() == 0]
+        if len(zero_ops) > 0:
+            st.error(f"Found {len(zero_ops)} service(s) with 0 operations: {', '.join(zero_ops)}")
         else:
             st.success("All services have non-zero operations")
 
         # Check 3: Verify cost per request is reasonable
-        unreasonable_costs = latest_30d[latest_30d['cost_per_request'] > 10]  # Flag if >$10 per request
-        if not unreasonable_costs.empty:
-            st.warning(f"Unusually high cost per request detected for: {', '.join(unreasonable_costs['SERVICE_TYPE'].tolist())}")
+        unreasonable_costs = service_names[latest_30d['cost_per_request'].to_numpy() > 10]  # Flag if >$10 per request
+        if len(unreasonable_costs) > 0:
+            st.warning(f"Unusually high cost per request detected for: {', '.join(unreasonable_costs)}")
         else:
             st.success("All cost per request values are in a reasonable range")
 
         # Check 4: Data completeness
         st.markdown("**Data Completeness:**")
-        for _, row in latest_30d.iterrows():
-            days_pct = (row['days_with_data'] / 30) * 100
+        days_with_data = latest_30d['days_with_data'].to_numpy()
+        coverage_pct = days_with_data / 30 * 100
+        for service, days, days_pct in zip(service_names, days_with_data, coverage_pct):
             if days_pct < 30:
-                st.warning(f"{row['SERVICE_TYPE']}: Only {row['days_with_data']} days of data ({days_pct:.0f}% of 30 days)")
+                st.warning(f"{service}: Only {days} days of data ({days_pct:.0f}% of 30 days)")
             else:
-                st.info(f"{row['SERVICE_TYPE']}: {row['days_with_data']} days of data ({days_pct:.0f}% coverage)")
+                st.info(f"{service}: {days} days of data ({days_pct:.0f}% coverage)")
 
         st.markdown("---")
         st.markdown("**Raw Input Data (Last 10 Rows):**")
@@ -2598,20 +2907,22 @@ def show_cost_per_user_calculator(df, credit_cost):
     # Initialize session state for user personas if not exists
     if 'user_personas_simple' not in st.session_state:
         st.session_state.user_personas_simple = [
-            {'name': 'Power User', 'count': 10, 'requests_per_day': 50},
-            {'name': 'Regular User', 'count': 30, 'requests_per_day': 20}
+            {'id': uuid.uuid4().hex, 'name': 'Power User', 'count': 10, 'requests_per_day': 50},
+            {'id': uuid.uuid4().hex, 'name': 'Regular User', 'count': 30, 'requests_per_day': 20}
         ]
 
-    # User persona inputs
+    # User persona inputs. Widgets are keyed on a per-persona id rather than the list
+    # position, so removing a persona leaves the widgets below it in place.
     personas_to_remove = []
-    for idx, persona in enumerate(st.session_state.user_personas_simple):
+    for persona in st.session_state.user_personas_simple:
+        persona_id = persona.setdefault('id', uuid.uuid4().hex)
         col1, col2, col3, col4 = st.columns([2, 1, 1, 0.5])
 
         with col1:
             persona['name'] = st.text_input(
                 "Persona Name",
                 value=persona['name'],
-                key=f"simple_persona_name_{idx}",
+                key=f"simple_persona_name_{persona_id}",
                 placeholder="e.g., Power User, Analyst, Executive"
             )
 
@@ -2621,7 +2932,7 @@ def show_cost_per_user_calculator(df, credit_cost):
                 min_value=1,
                 value=persona['count'],
                 step=1,
-                key=f"simple_count_{idx}"
+                key=f"simple_count_{persona_id}"
             )
 
         with col3:
@@ -2630,23 +2941,26 @@ def show_cost_per_user_calculator(df, credit_cost):
                 min_value=1,
                 value=persona['requests_per_day'],
                 step=5,
-                key=f"simple_req_{idx}",
+                key=f"simple_req_{persona_id}",
                 help="Average requests per user per day"
             )
 
         with col4:
             if len(st.session_state.user_personas_simple) > 1:
-                if st.button("Remove", key=f"simple_remove_{idx}", help="Remove"):
-                    personas_to_remove.append(idx)
+                if st.button("Remove", key=f"simple_remove_{persona_id}", help="Remove"):
+                    personas_to_remove.append(persona_id)
 
     # Remove personas marked for deletion
-    for idx in sorted(personas_to_remove, reverse=True):
-        st.session_state.user_personas_simple.pop(idx)
+    if personas_to_remove:
+        st.session_state.user_personas_simple = [
+            p for p in st.session_state.user_personas_simple if p['id'] not in personas_to_remove
+        ]
         st.rerun()
 
     # Add new persona button
     if st.button("Add Another Persona"):
         st.session_state.user_personas_simple.append({
+            'id': uuid.uuid4().hex,
             'name': f'User Type {len(st.session_state.user_personas_simple) + 1}',
             'count': 10,
             'requests_per_day': 20
@@ -2675,43 +2989,41 @@ def show_cost_per_user_calculator(df, credit_cost):
     else:
         # Calculate weighted average cost per request across all services from actual data
         total_ops = latest_30d['requests_per_day'].sum() * 30  # Monthly operations
-        total_cost_30d = sum(
-            (row['requests_per_day'] * 30 * row['cost_per_request'])
-            for _, row in latest_30d.iterrows()
-        )
+        total_cost_30d = (latest_30d['requests_per_day'] * 30 * latest_30d['cost_per_request']).sum()
         avg_cost_per_request = total_cost_30d / total_ops if total_ops > 0 else 0
         st.info(f"Using observed rate from your data: ${avg_cost_per_request:.6f} per request")
 
-    # Calculate costs for each persona
-    persona_results = []
-    for persona in st.session_state.user_personas_simple:
-        monthly_requests = persona['requests_per_day'] * 30
-        cost_per_user_monthly = monthly_requests * avg_cost_per_request
-        total_cost_monthly = cost_per_user_monthly * persona['count']
-
-        persona_results.append({
-            'Persona': persona['name'],
-            'Users': persona['count'],
-            'Requests/Day': persona['requests_per_day'],
-            'Requests/Month': f"{monthly_requests:,}",
-            'Cost/Request': f"${avg_cost_per_request:.6f}",
-            'Cost/User/Month': f"${cost_per_user_monthly:,.2f}",
-            'Total Monthly Cost': f"${total_cost_monthly:,.2f}"
-        })
+    # Persona inputs as columns so the totals below are array sums
+    personas_df = pd.DataFrame(st.session_state.user_personas_simple)
+    persona_counts = personas_df['count'].to_numpy()
+    persona_monthly_requests = personas_df['requests_per_day'].to_numpy() * 30
 
-    results_df = pd.DataFrame(persona_results)
-    st.dataframe(results_df, use_container_width=True, hide_index=True)
+    # Calculate costs for each persona
+    cost_per_user_monthly = persona_monthly_requests * avg_cost_per_request
+    results_df = pd.DataFrame({
+        'Persona': personas_df['name'],
+        'Users': persona_counts,
+        'Requests/Day': personas_df['requests_per_day'],
+        'Requests/Month': persona_monthly_requests,
+        'Cost/Request': avg_cost_per_request,
+        'Cost/User/Month': cost_per_user_monthly,
+        'Total Monthly Cost': cost_per_user_monthly * persona_counts,
+    })
+    st.dataframe(
+        results_df.style.format({
+            'Requests/Month': '{:,}',
+            'Cost/Request': '${:.6f}',
+            'Cost/User/Month': '${:,.2f}',
+            'Total Monthly Cost': '${:,.2f}'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
 
     # Summary metrics
-    total_users = sum(p['count'] for p in st.session_state.user_personas_simple)
-    total_monthly_cost = sum(
-        p['requests_per_day'] * 30 * avg_cost_per_request * p['count']
-        for p in st.session_state.user_personas_simple
-    )
-    total_monthly_requests = sum(
-        p['requests_per_day'] * 30 * p['count']
-        for p in st.session_state.user_personas_simple
-    )
+    total_users = int(persona_counts.sum())
+    total_monthly_requests = int((persona_monthly_requests * persona_counts).sum())
+    total_monthly_cost = total_monthly_requests * avg_cost_per_request
     avg_cost_per_user = total_monthly_cost / total_users if total_users > 0 else 0
 
     st.divider()
@@ -2751,7 +3063,7 @@ def show_summary_report(df, credit_cost, variance_pct):
 
     total_credits = df['TOTAL_CREDITS'].sum()
     total_cost = total_credits * credit_cost
-    days_of_data = len(df['DATE'].unique())
+    days_of_data = int(df['DATE'].nunique())
     avg_daily_cost = total_cost / days_of_data if days_of_data > 0 else 0
 
     col1, col2, col3 = st.columns(3)
@@ -2775,8 +3087,7 @@ def show_summary_report(df, credit_cost, variance_pct):
     # Projection
     st.markdown("## 12-Month Projection (25% Growth)")
 
-    projection_df = calculate_growth_projection(df, 0.25, 12, credit_cost)
-    monthly_totals = projection_df.groupby('month')['projected_cost_usd'].sum()
+    monthly_totals = calculate_monthly_projection(summarize_usage(df)['service_totals'], 0.25, 12, credit_cost)
     total_year_cost = monthly_totals.sum()
 
     col1, col2, col3 = st.columns(3)
@@ -2798,7 +3109,7 @@ def show_summary_report(df, credit_cost, variance_pct):
     # Service breakdown
     st.markdown("## Service Breakdown")
 
-    service_agg = df.groupby('SERVICE_TYPE').agg({
+    service_agg = df.groupby('SERVICE_TYPE', sort=False, observed=True).agg({
         'TOTAL_CREDITS': 'sum',
         'DAILY_UNIQUE_USERS': 'mean',
         'TOTAL_OPERATIONS': 'sum'
@@ -2822,10 +3133,9 @@ def show_summary_report(df, credit_cost, variance_pct):
     st.divider()
     st.markdown("## Export Data")
 
-    csv = df.to_csv(index=False)
     st.download_button(
         label="Download Historical Data (CSV)",
-        data=csv,
+        data=_csv_bytes(df),
         file_name=f"cortex_usage_{datetime.now().strftime('%Y%m%d')}.csv",
         mime="text/csv"
     )
@@ -0,0 +1,261 @@
+"""
+Cortex Cost Calculator - Helper Equivalence Tests
+
+Checks the vectorized numeric helpers in streamlit_app.py against straightforward
+per-group / per-row reference implementations, including null and gap edge cases.
+
+Requires the app's runtime packages (streamlit, snowflake-snowpark-python, pandas,
+numpy, plotly); skipped when they are not installed. The Snowflake session is
+patched out, so no account connection is needed.
+
+Author: SE Community
+Created: 2026-01-05
+Expires: See deploy_all.sql
+"""
+
+import importlib.util
+import logging
+import os
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+    import pandas as pd
+    import streamlit
+    import snowflake.snowpark.context  # noqa: F401
+    HAVE_APP_DEPS = hasattr(streamlit, "cache_data")
+except ImportError:
+    HAVE_APP_DEPS = False
+
+APP_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "streamlit", "cortex_cost_calculator", "streamlit_app.py"
+)
+
+
+def load_app():
+    """Import streamlit_app.py with get_active_session patched out."""
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with mock.patch("snowflake.snowpark.context.get_active_session"):
+        spec = importlib.util.spec_from_file_location("cortex_streamlit_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+def usage_frame(rows):
+    """Daily usage frame in the shape _prepare_usage_df produces."""
+    df = pd.DataFrame(rows, columns=["DATE", "SERVICE_TYPE", "DAILY_UNIQUE_USERS", "TOTAL_OPERATIONS", "TOTAL_CREDITS"])
+    df["DATE"] = pd.to_datetime(df["DATE"])
+    df["SERVICE_TYPE"] = df["SERVICE_TYPE"].astype("category")
+    return df
+
+
+def reference_30day_totals(df):
+    """Original per-group transform implementation of calculate_30day_totals."""
+    df_sorted = df.sort_values("DATE", kind="stable")
+    grouped = df_sorted.groupby("SERVICE_TYPE", observed=True)
+    df_sorted["credits_30d_total"] = grouped["TOTAL_CREDITS"].transform(
+        lambda x: x.rolling(window=30, min_periods=1).sum()
+    )
+    df_sorted["operations_30d_total"] = grouped["TOTAL_OPERATIONS"].transform(
+        lambda x: x.rolling(window=30, min_periods=1).sum()
+    )
+    df_sorted["users_30d_avg"] = grouped["DAILY_UNIQUE_USERS"].transform(
+        lambda x: x.rolling(window=30, min_periods=1).mean()
+    )
+    cost = df_sorted["credits_30d_total"] / df_sorted["users_30d_avg"]
+    df_sorted["cost_per_user_30d"] = cost.replace([np.inf, -np.inf], np.nan).fillna(0)
+    return df_sorted
+
+
+@unittest.skipUnless(HAVE_APP_DEPS, "streamlit / snowflake-snowpark-python not installed")
+class TestRollingTotals(unittest.TestCase):
+    """calculate_30day_totals against the original per-group transform"""
+
+    WINDOW_COLUMNS = ["credits_30d_total", "operations_30d_total", "users_30d_avg", "cost_per_user_30d"]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_app()
+
+    def assert_matches_reference(self, df):
+        result = self.app.calculate_30day_totals(df)
+        # Newest rows first
+        self.assertTrue(result["DATE"].is_monotonic_decreasing)
+        actual = result.sort_index()
+        expected = reference_30day_totals(df).sort_index()
+        self.assertEqual(len(actual), len(df))
+        for col in self.WINDOW_COLUMNS:
+            np.testing.assert_allclose(
+                actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                rtol=1e-9, equal_nan=True, err_msg=col
+            )
+
+    def test_dense_grid(self):
+        """One row per service per day (40 days, two services), shuffled input order"""
+        rng = np.random.default_rng(7)
+        dates = pd.date_range("2025-01-01", periods=40)
+        rows = [
+            (d, svc, int(rng.integers(0, 20)), int(rng.integers(0, 500)), float(rng.uniform(0, 50)))
+            for d in dates for svc in ("Cortex Analyst", "Cortex Search")
+        ]
+        df = usage_frame(rows).sample(frac=1, random_state=1)
+        self.assert_matches_reference(df)
+
+    def test_sparse_with_gaps_and_duplicates(self):
+        """Missing days and a duplicated service-day take the groupby rolling path"""
+        rows = [
+            ("2025-01-01", "Cortex Analyst", 2, 10, 1.0),
+            ("2025-01-03", "Cortex Analyst", 4, 20, 2.0),
+            ("2025-01-03", "Cortex Analyst", 1, 5, 0.5),
+            ("2025-01-02", "Cortex Search", 0, 0, 0.0),
+            ("2025-02-15", "Cortex Search", 3, 30, 3.0),
+        ]
+        self.assert_matches_reference(usage_frame(rows))
+
+    def test_null_service_type(self):
+        """Rows without a service get NaN windows and zero cost per user instead of raising"""
+        rows = [
+            ("2025-01-01", "Cortex Analyst", 1, 1, 1.0),
+            ("2025-01-02", "Cortex Analyst", 1, 2, 2.0),
+            ("2025-01-01", "Cortex Search", 1, 3, 3.0),
+            ("2025-01-02", None, 1, 4, 4.0),
+        ]
+        df = usage_frame(rows)
+        result = self.app.calculate_30day_totals(df)
+        null_row = result[result["SERVICE_TYPE"].isna()]
+        self.assertEqual(len(null_row), 1)
+        self.assertTrue(np.isnan(null_row["credits_30d_total"].iloc[0]))
+        self.assertEqual(null_row["cost_per_user_30d"].iloc[0], 0)
+        self.assert_matches_reference(df)
+
+    def test_zero_users(self):
+        """A window with no users costs 0 per user rather than inf"""
+        df = usage_frame([("2025-01-01", "Cortex Search", 0, 5, 2.0)])
+        result = self.app.calculate_30day_totals(df)
+        self.assertEqual(result["cost_per_user_30d"].iloc[0], 0)
+
+    def test_sql_window_columns(self):
+        """Windows computed in Snowflake are renamed, not recomputed"""
+        df = usage_frame([
+            ("2025-01-01", "Cortex Analyst", 2, 10, 1.0),
+            ("2025-01-02", "Cortex Analyst", 2, 10, 1.0),
+        ])
+        df["CREDITS_30D_TOTAL"] = [5.0, 8.0]
+        df["OPERATIONS_30D_TOTAL"] = [50, 80]
+        df["USERS_30D_AVG"] = [2.0, 0.0]
+        result = self.app.calculate_30day_totals(df)
+        self.assertEqual(list(result["credits_30d_total"]), [8.0, 5.0])
+        self.assertEqual(list(result["operations_30d_total"]), [80, 50])
+        self.assertEqual(list(result["cost_per_user_30d"]), [0.0, 2.5])
+
+    def test_empty_frame(self):
+        self.assertTrue(self.app.calculate_30day_totals(pd.DataFrame()).empty)
+
+
+@unittest.skipUnless(HAVE_APP_DEPS, "streamlit / snowflake-snowpark-python not installed")
+class TestProjectionHelpers(unittest.TestCase):
+    """Growth and POC scenario projections against per-row reference math"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_app()
+
+    def test_growth_projection_matches_loop(self):
+        """Month x service grid equals the nested-loop projection, with 0 cost/user for no users"""
+        df = usage_frame([
+            ("2025-01-01", "Cortex Search", 0, 5, 4.0),
+            ("2025-01-01", "Cortex Analyst", 10, 50, 20.0),
+            ("2025-01-02", "Cortex Analyst", 20, 50, 10.0),
+        ])
+        baseline = self.app.summarize_usage(df)["service_totals"]
+        result = self.app.calculate_growth_projection(baseline, 0.1, 3, 2.0)
+
+        expected = []
+        for month in range(1, 4):
+            factor = 1.1 ** month
+            for service, credits, users in (("Cortex Analyst", 30.0, 15.0), ("Cortex Search", 4.0, 0.0)):
+                cost = credits * factor * 2.0
+                proj_users = users * factor
+                expected.append((month, service, cost, cost / proj_users if proj_users > 0 else 0))
+
+        self.assertEqual(len(result), len(expected))
+        for row, (month, service, cost, per_user) in zip(result.itertuples(index=False), expected):
+            self.assertEqual(row.month, month)
+            self.assertEqual(row.service_type, service)
+            self.assertAlmostEqual(row.projected_cost_usd, cost, places=9)
+            self.assertAlmostEqual(row.cost_per_user_usd, per_user, places=9)
+
+        monthly = self.app.calculate_monthly_projection(baseline, 0.1, 3, 2.0)
+        self.assertEqual(list(monthly.index), [1, 2, 3])
+        self.assertAlmostEqual(monthly.loc[2], 34.0 * 1.1 ** 2 * 2.0, places=9)
+
+    def test_poc_scenario_comparison_matches_single_projection(self):
+        for users in (12, 0):
+            table = self.app.calculate_poc_scenario_comparison(1500.0, users)
+            presets = [key for key in self.app.POC_TO_PROD_MULTIPLIERS if key != "Custom"]
+            self.assertEqual(len(table), len(presets))
+            for row, key in zip(table.itertuples(index=False), presets):
+                single = self.app.calculate_poc_to_prod_projection(1500.0, users, key)
+                self.assertEqual(row.Scenario, key.split(" (")[0])
+                self.assertAlmostEqual(row.Users, single["projected_users"])
+                self.assertAlmostEqual(row.Monthly, single["projected_monthly_cost"])
+                self.assertAlmostEqual(row.Annual, single["projected_annual_cost"])
+                self.assertAlmostEqual(row[4], single["cost_per_user"])  # Cost/User
+
+
+@unittest.skipUnless(HAVE_APP_DEPS, "streamlit / snowflake-snowpark-python not installed")
+class TestChartAndMaturityHelpers(unittest.TestCase):
+    """Downsampling and data-maturity assessment"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_app()
+
+    def test_downsample_keeps_small_frames(self):
+        df = pd.DataFrame({"DATE": pd.date_range("2025-01-01", periods=10), "v": range(10)})
+        self.assertIs(self.app._maybe_downsample(df, "DATE", max_points=10), df)
+
+    def test_downsample_keeps_whole_x_positions(self):
+        """Every series keeps the same thinned x values"""
+        dates = pd.date_range("2025-01-01", periods=100)
+        df = pd.DataFrame({
+            "DATE": np.repeat(dates, 3),
+            "SERVICE_TYPE": np.tile(["a", "b", "c"], 100),
+            "v": np.arange(300),
+        })
+        thinned = self.app._maybe_downsample(df, "DATE", max_points=50)
+        self.assertLessEqual(len(thinned), 51)
+        kept = thinned.groupby("SERVICE_TYPE")["DATE"].apply(tuple)
+        self.assertEqual(kept.nunique(), 1)
+        self.assertEqual(kept.iloc[0], tuple(dates[::6]))
+
+    def test_maturity_no_data(self):
+        result = self.app.assess_data_maturity(pd.DataFrame())
+        self.assertEqual(result["level"], "none")
+        self.assertFalse(result["ready_for_projection"])
+
+    def test_maturity_counts_distinct_days_and_gaps(self):
+        """Duplicate rows per day count once; missing days lower completeness"""
+        dates = list(pd.date_range("2025-01-01", periods=10)) + [pd.Timestamp("2025-01-20")]
+        df = usage_frame(
+            [(d, svc, 1, 1, 1.0) for d in dates for svc in ("Cortex Analyst", "Cortex Search")]
+        )
+        result = self.app.assess_data_maturity(df)
+        self.assertEqual(result["days"], 11)
+        # 11 of 20 calendar days present: 11/30*60 + 11/20*40
+        self.assertEqual(result["confidence_score"], int(11 / 30 * 60 + 11 / 20 * 40))
+        self.assertEqual(
+            result, self.app._assess_data_maturity_cached(11, pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-20"))
+        )
+
+    def test_maturity_single_day(self):
+        df = usage_frame([("2025-01-01", "Cortex Analyst", 1, 1, 1.0)])
+        result = self.app.assess_data_maturity(df)
+        self.assertEqual(result["level"], "insufficient")
+        self.assertEqual(result["confidence_score"], int(1 / 30 * 60 + 40))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)